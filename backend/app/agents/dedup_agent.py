@@ -0,0 +1,144 @@
+# app/agents/dedup_agent.py
+import re
+import zlib
+from typing import List, Dict
+import numpy as np
+from ..core.schemas import Listing
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+# "128 GB" / "6.1 inch" -> "128gb" / "6.1inch", so capacities survive tokenization as one token
+_UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)\s+(gb|tb|mb|mah|mp|hz|w|inch|cm|mm|kg|g|ml|l)\b")
+_STOPWORDS = frozenset(
+    "a an and the with for of in on by to new latest edition combo pack set free men women unisex".split()
+)
+
+# Mersenne prime for the universal hashes; token hashes are reduced below it
+_PRIME = (1 << 31) - 1
+_ALT_FIELDS = ("name", "price", "rating", "reviews", "link", "source")
+
+
+def title_tokens(name: str) -> frozenset:
+    text = _UNIT_RE.sub(r"\1\2", (name or "").lower())
+    return frozenset(_TOKEN_RE.findall(text)) - _STOPWORDS
+
+
+def _offer_key(it: Listing):
+    # best offer first: lowest price, then better rating, then more reviews; unpriced items last
+    price = it.price
+    return (price is None or price <= 0, price or 0.0, -(it.rating or 0.0), -(it.reviews or 0))
+
+
+class DedupAgent:
+    """Cluster near-identical listings across sites with MinHash + LSH banding.
+
+    Titles become token sets; each gets a ``num_perm`` MinHash signature, cut into
+    ``bands`` bands. Items sharing a band bucket are candidates, and a candidate
+    joins the bucket's first item's cluster only if the token Jaccard is at least
+    ``threshold``, digit-bearing tokens (model numbers, capacities) agree, and the
+    prices are within ``price_tolerance`` of each other. Buckets are checked
+    against one anchor each, so the work stays linear in the number of items.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.6,
+                 price_tolerance: float = 0.15, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.price_tolerance = price_tolerance
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        # folds a band's rows into one bucket key; a rare collision only costs a rejected check
+        self._mix = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, token_sets: List[frozenset]) -> np.ndarray:
+        """(n, num_perm) MinHash signatures; rows for empty token sets are all _PRIME."""
+        n = len(token_sets)
+        sigs = np.full((n, self.num_perm), _PRIME, dtype=np.uint64)
+        owners = [i for i, toks in enumerate(token_sets) if toks]
+        if not owners:
+            return sigs
+        lengths = np.array([len(token_sets[i]) for i in owners])
+        # titles share most of their vocabulary; hash each distinct token once
+        token_hash: Dict[str, int] = {}
+        for i in owners:
+            for t in token_sets[i]:
+                if t not in token_hash:
+                    token_hash[t] = zlib.crc32(t.encode()) % _PRIME
+        hashes = np.fromiter((token_hash[t] for i in owners for t in token_sets[i]),
+                             dtype=np.uint64, count=int(lengths.sum()))
+        # every permutation over every token at once, then a min per item's token run
+        permuted = (self._a * hashes + self._b) % _PRIME
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        sigs[owners] = np.minimum.reduceat(permuted, starts, axis=1).T
+        return sigs
+
+    def _similar(self, a: frozenset, b: frozenset, pa, pb) -> bool:
+        inter = len(a & b)
+        if inter / (len(a) + len(b) - inter) < self.threshold:
+            return False
+        # "iphone 15 128gb" vs "iphone 15 256gb" share most tokens but aren't the same product
+        if {t for t in a ^ b if any(c.isdigit() for c in t)}:
+            return False
+        if pa and pb and abs(pa - pb) / max(pa, pb) > self.price_tolerance:
+            return False
+        return True
+
+    def _candidate_pairs(self, sigs: np.ndarray, valid: np.ndarray):
+        """(anchor, other) index pairs sharing a bucket in some band; anchor is the bucket's first item."""
+        idx = np.flatnonzero(valid)
+        for band in range(self.bands):
+            keys = sigs[idx, band * self.rows:(band + 1) * self.rows] @ self._mix
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            first = np.empty(len(order), dtype=bool)
+            first[:1] = True
+            first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            if first.all():
+                continue
+            anchor_pos = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+            dup = ~first
+            yield from zip(idx[order[anchor_pos[dup]]].tolist(), idx[order[dup]].tolist())
+
+    def clusters(self, items: List[Listing]) -> List[List[int]]:
+        """Index clusters over items, in order of each cluster's first item."""
+        token_sets = [title_tokens(it.name) for it in items]
+        sigs = self.signatures(token_sets)
+        parent = list(range(len(items)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        valid = np.fromiter((bool(t) for t in token_sets), dtype=bool, count=len(token_sets))
+        for anchor, i in self._candidate_pairs(sigs, valid):
+            ra, ri = find(anchor), find(i)
+            if ra != ri and self._similar(token_sets[anchor], token_sets[i],
+                                          items[anchor].price, items[i].price):
+                parent[max(ra, ri)] = min(ra, ri)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(items)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def dedupe(self, items: List[Listing]) -> List[Listing]:
+        """One item per cluster, the best offer, with the others listed under "alternates"."""
+        if len(items) < 2:
+            return items
+        kept = []
+        for group in self.clusters(items):
+            members = sorted((items[i] for i in group), key=_offer_key)
+            best = members[0]
+            if len(members) > 1:
+                best.alternates = [{f: getattr(m, f) for f in _ALT_FIELDS} for m in members[1:]]
+            else:
+                # may carry alternates from an earlier, larger snapshot
+                best.alternates = None
+            kept.append(best)
+        return kept
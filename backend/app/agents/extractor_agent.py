@@ -1,6 +1,13 @@
 # app/agents/extractor_agent.py
-from typing import List, Dict
-from app.sites import amazon, flipkart, myntra
+import asyncio
+import logging
+from typing import List, Dict, Optional
+from app.sites import amazon, flipkart, myntra, spec
+from app.utils.parse_pool import ParsePool
+from app.utils.metrics import span
+from app.core.schemas import Listing
+
+logger = logging.getLogger(__name__)
 
 SITE_PARSERS = {
     "amazon.in": amazon.parse_listings,
@@ -8,24 +15,88 @@ SITE_PARSERS = {
     "myntra.com": myntra.parse_listings
 }
 
+# site -> row builder for in-browser extracted rows (see app/sites/spec.py)
+SITE_ITEM_BUILDERS = {
+    "amazon.in": amazon.build_item,
+    "flipkart.com": flipkart.build_item,
+    "myntra.com": myntra.build_item
+}
+
+# site -> product detail page spec parser
+SITE_SPEC_PARSERS = {
+    "amazon.in": amazon.parse_specs,
+    "flipkart.com": flipkart.parse_specs,
+    "myntra.com": myntra.parse_specs
+}
+
+def _match_site(table: Dict, site: str):
+    # find best matching entry (allow domain partial)
+    for d, fn in table.items():
+        if d in site:
+            return fn
+    return None
+
+def extract_html(site: str, html: str, top_k: Optional[int] = 10) -> List[Listing]:
+    # module level so it can be shipped to a ParsePool worker process
+    parser = _match_site(SITE_PARSERS, site)
+    if parser is None:
+        # last-resort: try amazon parser
+        parser = amazon.parse_listings
+    return parser(html, top_k=top_k)
+
+def extract_specs(site: str, html: str) -> Dict[str, str]:
+    # module level for the ParsePool, like extract_html
+    parser = _match_site(SITE_SPEC_PARSERS, site)
+    return parser(html) if parser else {}
+
 class ExtractorAgent:
-    def __init__(self):
-        pass
-
-    def extract(self, site: str, html: str, top_k: int = 10) -> List[Dict]:
-        parser = None
-        # find best matching parser (allow domain partial)
-        for d, fn in SITE_PARSERS.items():
-            if d in site:
-                parser = fn
-                break
-        if parser is None:
-            # last-resort: try amazon parser
-            parser = amazon.parse_listings
+    def __init__(self, pool: ParsePool | None = None):
+        # without a pool, extract_async parses on the calling thread
+        self.pool = pool
+
+    def extract(self, site: str, html: str, top_k: Optional[int] = 10) -> List[Listing]:
         try:
-            items = parser(html, top_k=top_k)
-            return items
+            with span("parse", site):
+                return extract_html(site, html, top_k)
         except Exception as e:
             # return empty and let orchestrator continue
-            print("Extractor error for", site, e)
+            logger.warning("Extractor error for %s: %s", site, e)
             return []
+
+    async def extract_async(self, site: str, html: str, top_k: Optional[int] = 10) -> List[Listing]:
+        """Like extract, but parses in the ParsePool so the event loop stays free."""
+        if self.pool is None:
+            return self.extract(site, html, top_k)
+        try:
+            with span("parse", site):
+                return await self.pool.run(extract_html, site, html, top_k)
+        except asyncio.TimeoutError:
+            logger.warning("Extractor timed out for %s", site)
+            return []
+        except Exception as e:
+            logger.warning("Extractor error for %s: %s", site, e)
+            return []
+
+    def extract_rows(self, site: str, rows: List[Dict], top_k: Optional[int] = 10) -> List[Listing]:
+        """Build items from rows already extracted in the browser (NavigatorAgent.fetch_listing)."""
+        builder = _match_site(SITE_ITEM_BUILDERS, site) or amazon.build_item
+        try:
+            with span("build_items", site):
+                return spec.build_items(rows, builder, top_k=top_k)
+        except Exception as e:
+            logger.warning("Extractor error for %s: %s", site, e)
+            return []
+
+    async def extract_specs_async(self, site: str, html: str) -> Dict[str, str]:
+        """Spec table of a product detail page as {key: value}; {} when nothing matched."""
+        try:
+            with span("parse_specs", site):
+                if self.pool is None:
+                    return extract_specs(site, html)
+                return await self.pool.run(extract_specs, site, html)
+        except asyncio.TimeoutError:
+            logger.warning("Spec extraction timed out for %s", site)
+            return {}
+        except Exception as e:
+            logger.warning("Spec extraction error for %s: %s", site, e)
+            return {}
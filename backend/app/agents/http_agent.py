@@ -0,0 +1,58 @@
+# app/agents/http_agent.py
+import logging
+from typing import Optional
+import httpx
+from .navigator_agent import BlockedError, OVERLOAD_STATUSES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+    # no Accept-Encoding: httpx advertises exactly the encodings it can decode (br only with brotli installed)
+}
+
+class HttpAgent:
+    """Plain HTTP fetcher for listing pages that render server-side.
+
+    One pooled httpx client per process: keep-alive connections, HTTP/2 and
+    compressed transfers. Much cheaper than a browser page, but it sees no
+    JavaScript-rendered content, so callers escalate to NavigatorAgent when the
+    result looks thin.
+    """
+
+    def __init__(self, user_agent: Optional[str] = None, max_connections: int = 20,
+                 max_keepalive: int = 10, timeout: float = 10.0):
+        self.user_agent = user_agent
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # created lazily so it binds to the running event loop
+        if self._client is None:
+            headers = dict(DEFAULT_HEADERS)
+            if self.user_agent:
+                headers["User-Agent"] = self.user_agent
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=headers,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_keepalive),
+            )
+        return self._client
+
+    async def fetch_html(self, url: str, timeout: Optional[float] = None) -> str:
+        resp = await self._get_client().get(url, timeout=timeout or self.timeout)
+        if resp.status_code in OVERLOAD_STATUSES:
+            raise BlockedError(url, resp.status_code)
+        resp.raise_for_status()
+        return resp.text
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
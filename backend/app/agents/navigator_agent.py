@@ -1,28 +1,157 @@
 # app/agents/navigator_agent.py
-import asyncio
+import time
 from playwright.async_api import async_playwright, Page, Browser, TimeoutError
 import logging
-from typing import Optional, Callable
+from urllib.parse import urlsplit
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Optional, Dict, List
+from ..utils.browser_pool import BrowserPool
+from ..utils.metrics import span
+from ..utils.snapshot_store import SnapshotStore
 
 logger = logging.getLogger(__name__)
 
-async def _auto_scroll(page: Page, scroll_delay: float = 0.15, max_scrolls: int = 30):
-    # scroll down to trigger lazy loads
-    for _ in range(max_scrolls):
-        await page.evaluate("window.scrollBy(0, window.innerHeight)")
-        await asyncio.sleep(scroll_delay)
+# resource types never needed to read listing cards
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# third-party trackers common to every storefront; sites add their own via BLOCKED_HOSTS
+DEFAULT_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "scorecardresearch.com",
+)
+
+# count cards; unless there are enough already, scroll one screen and give lazy loaders a frame to react
+_SCROLL_STEP_JS = """
+async ([sel, minCards]) => {
+  const cards = sel ? document.querySelectorAll(sel).length : 0;
+  if (minCards && cards >= minCards) return {cards: cards, enough: true};
+  window.scrollBy(0, window.innerHeight);
+  await new Promise(r => requestAnimationFrame(() => r()));
+  const el = document.scrollingElement || document.body;
+  return {
+    cards: cards,
+    enough: false,
+    height: el.scrollHeight,
+    bottom: window.scrollY + window.innerHeight >= el.scrollHeight - 4,
+  };
+}
+"""
+
+_GROWTH_JS = """
+([sel, height, cards]) => {
+  const el = document.scrollingElement || document.body;
+  return el.scrollHeight > height || (!!sel && document.querySelectorAll(sel).length > cards);
+}
+"""
+
+# Evaluate a site's LISTING_LAYOUTS (app/sites/spec.py) in the page and return
+# one {field: text|attr} row per card, in a single CDP round trip.
+_EXTRACT_JS = """
+([layouts, limit]) => {
+  for (const layout of layouts) {
+    const cards = document.querySelectorAll(layout.card);
+    if (!cards.length) continue;
+    const rows = [];
+    for (const card of cards) {
+      const row = {};
+      for (const [name, [selectors, attr]] of Object.entries(layout.fields)) {
+        row[name] = null;
+        for (const sel of selectors) {
+          const el = sel === "" ? card : card.querySelector(sel);
+          if (el) {
+            row[name] = attr ? el.getAttribute(attr) : el.textContent.replace(/\\s+/g, " ").trim();
+            break;
+          }
+        }
+      }
+      rows.push(row);
+      if (limit && rows.length >= limit) break;
+    }
+    return rows;
+  }
+  return [];
+}
+"""
+
+async def extract_rows(page: Page, layouts: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+    return await page.evaluate(_EXTRACT_JS, [layouts, limit])
+
+# statuses that mean "slow down" rather than "no results"
+OVERLOAD_STATUSES = {429, 503}
+
+_BLOCK_CHECK_JS = """
+(markers) => {
+  const text = document.title + " " + (document.body ? document.body.innerText.slice(0, 3000) : "");
+  return markers.some(m => text.includes(m));
+}
+"""
+
+class BlockedError(Exception):
+    """The site answered with a rate-limit status or a block/captcha page."""
+
+    def __init__(self, url: str, status: Optional[int] = None):
+        super().__init__(f"blocked by {url} (status={status})")
+        self.url = url
+        self.status = status
+
+def _budget_ms(deadline: Optional[float], cap: int) -> int:
+    # clamp a stage timeout to what is left of the caller's deadline (time.monotonic() based)
+    if deadline is None:
+        return cap
+    return max(1, min(cap, int((deadline - time.monotonic()) * 1000)))
+
+def _host_blocked(url: str, blocked_hosts) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == h or host.endswith("." + h) for h in blocked_hosts)
+
+async def _auto_scroll(page: Page, card_selector: Optional[str] = None, min_cards: Optional[int] = None,
+                       max_scrolls: int = 30, settle_timeout: int = 1500, deadline: Optional[float] = None) -> bool:
+    # scroll down to trigger lazy loads; stop once enough cards are present, the page stops growing
+    # or the deadline passes. returns True if the page was scrolled at all
+    for i in range(max_scrolls):
+        if deadline is not None and time.monotonic() >= deadline:
+            return i > 0
+        state = await page.evaluate(_SCROLL_STEP_JS, [card_selector, min_cards if card_selector else None])
+        if state["enough"]:
+            # counted before this step's scroll, so only earlier steps moved the page
+            return i > 0
+        if state["bottom"]:
+            try:
+                await page.wait_for_function(_GROWTH_JS, arg=[card_selector, state["height"], state["cards"]],
+                                             timeout=_budget_ms(deadline, settle_timeout))
+            except TimeoutError:
+                break
+    return True
 
 class NavigatorAgent:
-    def __init__(self, headless: bool = True, slow_mo: int = 0, user_agent: Optional[str] = None):
+    def __init__(self, headless: bool = True, slow_mo: int = 0, user_agent: Optional[str] = None, pool: Optional[BrowserPool] = None,
+                 snapshots: Optional[SnapshotStore] = None):
         self.headless = headless
         self.slow_mo = slow_mo
         self.user_agent = user_agent
+        # with a pool, contexts are checked out of shared warm browsers and nothing is launched here
+        self.pool = pool
+        # record every fetched page to the store, or (replay mode) serve pages from it without a browser
+        self.snapshots = snapshots
         self._playwright = None
         self._browser: Optional[Browser] = None
 
+    @property
+    def replaying(self) -> bool:
+        return self.snapshots is not None and self.snapshots.replay
+
     async def __aenter__(self):
-        self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(headless=self.headless, args=["--no-sandbox"], slow_mo=self.slow_mo)
+        if self.pool is None and not self.replaying:
+            with span("browser_launch"):
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless, args=["--no-sandbox"], slow_mo=self.slow_mo)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
@@ -31,27 +160,136 @@ class NavigatorAgent:
         if self._playwright:
             await self._playwright.stop()
 
-    async def fetch_listing_html(self, url: str, wait_for_selector: Optional[str] = None, timeout: int = 30000) -> str:
-        """Open page, wait for selector (if provided), auto-scroll and return HTML content."""
-        context = await self._browser.new_context(user_agent=self.user_agent)
-        page = await context.new_page()
-        try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
-            # small random sleep to mimic human behavior
-            await asyncio.sleep(0.6)
-            if wait_for_selector:
+    @asynccontextmanager
+    async def _context(self, site: str = ""):
+        async with AsyncExitStack() as stack:
+            with span("browser_checkout", site):
+                if self.pool is not None:
+                    context = await stack.enter_async_context(self.pool.context())
+                else:
+                    context = await self._browser.new_context(user_agent=self.user_agent)
+                    stack.push_async_callback(context.close)
+            yield context
+
+    async def _block_resources(self, page: Page, blocked_hosts):
+        async def _filter(route):
+            req = route.request
+            if req.resource_type in BLOCKED_RESOURCE_TYPES or _host_blocked(req.url, blocked_hosts):
+                await route.abort()
+            else:
+                await route.continue_()
+        await page.route("**/*", _filter)
+
+    async def fetch_listing_html(self, url: str, wait_for_selector: Optional[str] = None, timeout: int = 30000,
+                                 card_selector: Optional[str] = None, min_cards: Optional[int] = None,
+                                 block_resources: bool = True, blocked_hosts=(), deadline: Optional[float] = None) -> str:
+        """Open page, wait for selector (if provided), auto-scroll and return HTML content.
+
+        With ``block_resources`` images, media, fonts and tracker hosts are aborted before
+        they hit the network. Given a ``card_selector``, scrolling stops as soon as
+        ``min_cards`` result cards are on the page.
+        """
+        result = await self.fetch_listing(url, wait_for_selector=wait_for_selector, timeout=timeout,
+                                          card_selector=card_selector, min_cards=min_cards,
+                                          block_resources=block_resources, blocked_hosts=blocked_hosts,
+                                          deadline=deadline)
+        return result["html"]
+
+    async def fetch_detail_html(self, url: str, wait_for_selector: Optional[str] = None, timeout: int = 20000,
+                                block_resources: bool = True, blocked_hosts=(), deadline: Optional[float] = None,
+                                block_markers=(), site: str = "") -> str:
+        """Load a product detail page and return its HTML; no scrolling, spec tables render up front.
+
+        Same blocking, deadline and BlockedError rules as fetch_listing.
+        """
+        if self.replaying:
+            return await self.snapshots.get_async(url)
+        async with self._context(site) as context:
+            page = await context.new_page()
+            try:
+                if block_resources:
+                    await self._block_resources(page, DEFAULT_BLOCKED_HOSTS + tuple(blocked_hosts))
+                with span("detail_goto", site):
+                    response = await page.goto(url, wait_until="domcontentloaded", timeout=_budget_ms(deadline, timeout))
+                if response is not None and response.status in OVERLOAD_STATUSES:
+                    raise BlockedError(url, response.status)
+                if wait_for_selector:
+                    try:
+                        await page.wait_for_selector(wait_for_selector, timeout=_budget_ms(deadline, 8000))
+                    except TimeoutError:
+                        if block_markers and await page.evaluate(_BLOCK_CHECK_JS, list(block_markers)):
+                            raise BlockedError(url, response.status if response is not None else None)
+                html = await page.content()
+                if self.snapshots is not None:
+                    await self.snapshots.put_async(url, html, kind="detail")
+                return html
+            finally:
                 try:
-                    await page.wait_for_selector(wait_for_selector, timeout=12000)
-                except TimeoutError:
-                    logger.debug("wait_for_selector timed out: %s", wait_for_selector)
-            # auto scroll to load lazy items
-            await _auto_scroll(page)
-            await asyncio.sleep(0.6)
-            html = await page.content()
-            return html
-        finally:
+                    await page.close()
+                except Exception:
+                    pass
+
+    async def fetch_listing(self, url: str, layouts: Optional[List[Dict]] = None, wait_for_selector: Optional[str] = None,
+                            timeout: int = 30000, card_selector: Optional[str] = None, min_cards: Optional[int] = None,
+                            block_resources: bool = True, blocked_hosts=(), deadline: Optional[float] = None,
+                            block_markers=(), site: str = "") -> Dict:
+        """Load a listing page like fetch_listing_html and return {"rows": ..., "html": ...}.
+
+        Given ``layouts`` the cards are read in-browser with one page.evaluate and
+        "rows" holds the raw field values; the HTML is only serialized (for the
+        offline parser fallback) when that finds no cards. Every wait is clamped to
+        ``deadline`` (time.monotonic()); once it passes, whatever has loaded is read.
+        Raises BlockedError on a 429/503 response, or when the result cards never
+        show up and the page contains one of ``block_markers``. Each stage is timed
+        with metrics.span, labelled with ``site``.
+
+        With a recording ``snapshots`` store the page HTML is always serialized and
+        stored; in replay mode the stored HTML is returned as {"rows": None, "html": ...}
+        (raising SnapshotMissing for an unrecorded URL) and no browser is touched.
+        """
+        if self.replaying:
+            with span("snapshot_replay", site):
+                return {"rows": None, "html": await self.snapshots.get_async(url)}
+        async with self._context(site) as context:
+            page = await context.new_page()
             try:
-                await page.close()
-            except:
-                pass
-            await context.close()
+                if block_resources:
+                    await self._block_resources(page, DEFAULT_BLOCKED_HOSTS + tuple(blocked_hosts))
+                with span("goto", site):
+                    response = await page.goto(url, wait_until="domcontentloaded", timeout=_budget_ms(deadline, timeout))
+                if response is not None and response.status in OVERLOAD_STATUSES:
+                    raise BlockedError(url, response.status)
+                if wait_for_selector:
+                    try:
+                        with span("wait_selector", site):
+                            await page.wait_for_selector(wait_for_selector, timeout=_budget_ms(deadline, 12000))
+                    except TimeoutError:
+                        logger.debug("wait_for_selector timed out: %s", wait_for_selector)
+                        if block_markers and await page.evaluate(_BLOCK_CHECK_JS, list(block_markers)):
+                            raise BlockedError(url, response.status if response is not None else None)
+                # auto scroll to load lazy items
+                with span("scroll", site):
+                    scrolled = await _auto_scroll(page, card_selector=card_selector, min_cards=min_cards, deadline=deadline)
+                    if scrolled:
+                        # let the last lazy batch land, but never wait on long-polling trackers
+                        try:
+                            await page.wait_for_load_state("networkidle", timeout=_budget_ms(deadline, 2000))
+                        except TimeoutError:
+                            pass
+                rows = None
+                if layouts:
+                    with span("dom_extract", site):
+                        rows = await extract_rows(page, layouts)
+                    if rows and self.snapshots is None:
+                        return {"rows": rows, "html": None}
+                with span("content", site):
+                    html = await page.content()
+                if self.snapshots is not None:
+                    with span("snapshot_record", site):
+                        await self.snapshots.put_async(url, html)
+                return {"rows": rows, "html": html}
+            finally:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
@@ -1,38 +1,255 @@
 # app/agents/parser_agent.py
+import json
+import logging
+import os
+import random
 import re
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_SITES = ["amazon.in", "flipkart.com", "myntra.com"]
 
+# category -> words that put a query in it (singular and plural where they differ)
+CATEGORY_KEYWORDS = {
+    "laptops": ["laptop", "laptops", "notebook", "macbook", "chromebook", "ultrabook"],
+    "phones": ["phone", "phones", "smartphone", "smartphones", "mobile", "mobiles", "iphone"],
+    "tablets": ["tablet", "tablets", "ipad"],
+    "audio": ["headphone", "headphones", "earphone", "earphones", "earbuds", "tws", "speaker", "speakers",
+              "soundbar", "neckband"],
+    "tv": ["tv", "tvs", "television", "smart tv"],
+    # no bare "ac": it's as often the "ac adapter" of a laptop or phone
+    "appliances": ["fridge", "refrigerator", "washing machine", "microwave", "air conditioner", "split ac",
+                   "window ac", "inverter ac", "cooler", "geyser", "mixer", "grinder"],
+    "apparel": ["shirt", "shirts", "t-shirt", "t-shirts", "tshirt", "tshirts", "jeans", "trousers", "kurta",
+                "kurtas", "kurti", "saree", "sarees", "dress", "dresses", "jacket", "jackets", "hoodie",
+                "hoodies", "sweatshirt", "shorts", "top", "tops", "leggings", "lehenga", "blazer"],
+    "footwear": ["shoe", "shoes", "sneaker", "sneakers", "sandal", "sandals", "heels", "slippers", "flip flops",
+                 "boots", "loafers"],
+    "accessories": ["watch", "watches", "smartwatch", "bag", "bags", "backpack", "wallet", "wallets",
+                    "sunglasses", "belt", "belts", "handbag"],
+    "beauty": ["lipstick", "perfume", "deodorant", "moisturizer", "sunscreen", "shampoo", "serum", "kajal"],
+}
+
+# prior per-site hit rates by category, before any traffic has been observed
+CATEGORY_SITE_PRIORS = {
+    "laptops": {"amazon.in": 0.95, "flipkart.com": 0.9, "myntra.com": 0.02},
+    "phones": {"amazon.in": 0.95, "flipkart.com": 0.95, "myntra.com": 0.02},
+    "tablets": {"amazon.in": 0.9, "flipkart.com": 0.9, "myntra.com": 0.02},
+    "audio": {"amazon.in": 0.9, "flipkart.com": 0.85, "myntra.com": 0.3},
+    "tv": {"amazon.in": 0.9, "flipkart.com": 0.9, "myntra.com": 0.01},
+    "appliances": {"amazon.in": 0.9, "flipkart.com": 0.9, "myntra.com": 0.01},
+    "apparel": {"amazon.in": 0.6, "flipkart.com": 0.7, "myntra.com": 0.95},
+    "footwear": {"amazon.in": 0.7, "flipkart.com": 0.7, "myntra.com": 0.95},
+    "accessories": {"amazon.in": 0.8, "flipkart.com": 0.7, "myntra.com": 0.85},
+    "beauty": {"amazon.in": 0.8, "flipkart.com": 0.6, "myntra.com": 0.8},
+}
+
+BRANDS = [
+    "apple", "samsung", "oneplus", "xiaomi", "redmi", "realme", "oppo", "vivo", "motorola", "nokia", "google",
+    "iqoo", "poco", "nothing", "lenovo", "hp", "dell", "asus", "acer", "msi", "lg", "sony", "boat", "jbl",
+    "bose", "sennheiser", "noise", "fire-boltt", "mi", "tcl", "whirlpool", "bosch", "nike", "adidas", "puma",
+    "reebok", "skechers", "bata", "woodland", "roadster", "hrx", "levis", "levi's", "h&m", "zara", "allen solly",
+    "peter england", "van heusen", "u.s. polo assn.", "biba", "fossil", "titan", "casio", "wildcraft",
+    "american tourister", "lakme", "maybelline", "nivea",
+]
+
+# product lines that imply a brand the query doesn't name
+BRAND_ALIASES = {"iphone": "apple", "ipad": "apple", "macbook": "apple", "airpods": "apple", "galaxy": "samsung",
+                 "pixel": "google", "levi's": "levis"}
+
+COLORS = ["black", "white", "blue", "red", "green", "grey", "gray", "silver", "gold", "pink", "purple", "yellow",
+          "orange", "brown", "beige", "navy", "maroon", "olive"]
+
+
+def _alternation(words) -> str:
+    # longest first so "smart tv" wins over "tv" and "t-shirts" over "t-shirt"
+    return "|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+
+_CATEGORY_OF = {w: cat for cat, words in CATEGORY_KEYWORDS.items() for w in words}
+_CATEGORY_RE = re.compile(r"(?<![\w-])(%s)(?![\w-])" % _alternation(_CATEGORY_OF))
+_BRAND_RE = re.compile(r"(?<![\w&'.-])(%s)(?![\w&'-])" % _alternation(BRANDS + list(BRAND_ALIASES)))
+_COLOR_RE = re.compile(r"\b(%s)\b" % _alternation(COLORS))
+# "top 5", "top rated", "best selling": how to rank, not what to buy (and "top" is also an apparel word)
+_RANKING_RE = re.compile(r"\b(?:top|best)[\s-]+(?:\d+|ten|five|three|rated|selling|reviewed)\b")
+# what comes after these names what the product is for, not the product: "bag for macbook"
+_QUALIFIER_RE = re.compile(r"\b(?:for|with|compatible with)\b")
+
+# k / lakh multiplier; "4k tv", "2k monitor" are resolutions, not prices
+_UNIT = r"(k(?!\s*(?:tv|monitor|display|video|hdr|uhd|resolution)\b)|lakhs?|lacs?)"
+# a price: optional currency, digits with commas/decimals, optional multiplier
+_AMOUNT = r"(?:₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*%s?\b" % _UNIT
+_BETWEEN_RE = re.compile(r"(?:\b(?:between|from)\s*)?%s\s*(?:-|to|and)\s*%s" % (_AMOUNT, _AMOUNT))
+# no bare "max": "air max 90", "15 pro max" are product names
+_MAX_RE = re.compile(r"(?:\b(?:under|below|less than|upto|up to|within)|<)\s*%s" % _AMOUNT)
+_MIN_RE = re.compile(r"(?:\b(?:above|over|more than|at least|min|minimum|starting)|>)\s*%s" % _AMOUNT)
+# an amount with no under/above; only a budget with a currency, or a multiplier and a price word in the query
+_BUDGET_RE = re.compile(r"(?:(₹|\brs\.?|\binr)\s*)?(?<![\w.])(\d[\d,]*(?:\.\d+)?)\s*%s?\b" % _UNIT)
+_PRICE_WORDS_RE = re.compile(r"(?:\b(?:price|budget|range|rupees|rs|inr)\b|₹)")
+
+_RAM_RE = re.compile(r"\b(\d{1,2})\s*gb\s*ram\b")
+_STORAGE_RE = re.compile(r"\b(\d{2,4})\s*(gb|tb)\b(?!\s*ram)")
+_SIZE_RE = re.compile(r"\bsize\s*(xxs|xs|s|m|l|xl|xxl|xxxl|\d{1,2})\b")
+_SCREEN_RE = re.compile(r"\b(\d{2}(?:\.\d)?)\s*(?:inch|inches|\")")
+_GENDER_RE = re.compile(r"\b(men|mens|men's|women|womens|women's|boys|girls|kids|unisex)\b")
+
+
+def _amount(num: str, unit: Optional[str]) -> Optional[int]:
+    try:
+        value = float(num.replace(",", ""))
+    except ValueError:
+        return None
+    if unit:
+        value *= 1000 if unit == "k" else 100_000
+    return int(value)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def _plan(normalized: str):
+    """Everything in a plan that depends only on the query text; memoized per normalized query."""
+    text = normalized
+    price_min = price_max = None
+    m = _BETWEEN_RE.search(text)
+    # "1000-3000" or "between 15k and 25k", but not a bare "iphone 15 to 16"-style number pair
+    if m and (m.group(2) or m.group(4) or m.group(0).startswith(("between", "from")) or "-" in m.group(0)
+              or _PRICE_WORDS_RE.search(m.group(0))):
+        lo, hi = _amount(m.group(1), m.group(2) or m.group(4)), _amount(m.group(3), m.group(4))
+        if lo is not None and hi is not None:
+            price_min, price_max = min(lo, hi), max(lo, hi)
+            text = text.replace(m.group(0), " ")
+    if price_max is None and (m := _MAX_RE.search(text)):
+        price_max = _amount(m.group(1), m.group(2))
+        text = text.replace(m.group(0), " ")
+    if price_min is None and (m := _MIN_RE.search(text)):
+        price_min = _amount(m.group(1), m.group(2))
+        text = text.replace(m.group(0), " ")
+
+    if price_min is None and price_max is None:
+        price_word = _PRICE_WORDS_RE.search(text)
+        for m in _BUDGET_RE.finditer(text):
+            currency, num, unit = m.groups()
+            # "rs 30000", "30k budget" are budgets; "sony 4k tv", "air max 90", "256 gb" aren't
+            if currency or (unit and price_word):
+                price_max = _amount(num, unit)
+                text = text.replace(m.group(0), " ")
+                break
+
+    text = _RANKING_RE.sub(" ", text)
+    # the head noun comes last in English queries ("laptop bag" is a bag), ahead of any "for ..." qualifier
+    head = _QUALIFIER_RE.split(text, 1)[0]
+    categories = _CATEGORY_RE.findall(head) or _CATEGORY_RE.findall(text)
+    bm = _BRAND_RE.search(text)
+    attributes = {}
+    if m := _COLOR_RE.search(text):
+        attributes["color"] = m.group(1)
+    if m := _RAM_RE.search(text):
+        attributes["ram_gb"] = int(m.group(1))
+    if m := _STORAGE_RE.search(text):
+        attributes["storage_gb"] = int(m.group(1)) * (1024 if m.group(2) == "tb" else 1)
+    if m := _SIZE_RE.search(text):
+        attributes["size"] = m.group(1).upper()
+    if m := _SCREEN_RE.search(text):
+        attributes["screen_in"] = float(m.group(1))
+    if m := _GENDER_RE.search(text):
+        g = m.group(1).replace("'", "")
+        attributes["gender"] = {"mens": "men", "womens": "women"}.get(g, g)
+    # the site search gets the words, not the price phrase (filters handle that)
+    terms = " ".join(_PRICE_WORDS_RE.sub(" ", text).split()) or normalized
+    return {
+        "category": _CATEGORY_OF[categories[-1]] if categories else None,
+        "brand": BRAND_ALIASES.get(bm.group(1), bm.group(1)) if bm else None,
+        "attributes": attributes,
+        "price_min": price_min,
+        "price_max": price_max,
+        "search_terms": terms,
+    }
+
+
+class SiteRouter:
+    """Per-category site hit rates, learned from outcomes on top of CATEGORY_SITE_PRIORS.
+
+    A site's rate is (hits + prior * prior_weight) / (attempts + prior_weight); a
+    query goes to every site whose rate reaches ``min_rate`` (at least the best
+    one). Skipped sites are still tried with probability ``explore`` so a rate
+    that was learned low can recover. ``path`` persists the counts as JSON.
+    """
+
+    def __init__(self, sites: List[str] | None = None, priors: Dict[str, Dict[str, float]] | None = None,
+                 min_rate: float = 0.25, prior_weight: float = 10.0, explore: float = 0.05,
+                 path: Optional[str] = None):
+        self.sites = sites or DEFAULT_SITES
+        self.priors = priors if priors is not None else CATEGORY_SITE_PRIORS
+        self.min_rate = min_rate
+        self.prior_weight = prior_weight
+        self.explore = explore
+        self.path = path
+        # category -> site -> [hits, attempts]
+        self.counts: Dict[str, Dict[str, List[int]]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.counts = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("ignoring unreadable routing stats %s: %s", path, e)
+
+    def rate(self, category: str, site: str) -> float:
+        hits, attempts = self.counts.get(category, {}).get(site, (0, 0))
+        prior = self.priors.get(category, {}).get(site, 0.5)
+        return (hits + prior * self.prior_weight) / (attempts + self.prior_weight)
+
+    def route(self, category: Optional[str]) -> List[str]:
+        if category is None:
+            return list(self.sites)
+        rates = {site: self.rate(category, site) for site in self.sites}
+        chosen = [s for s in self.sites if rates[s] >= self.min_rate or random.random() < self.explore]
+        return chosen or [max(self.sites, key=rates.get)]
+
+    def record(self, category: Optional[str], site: str, hit: bool):
+        if category is None:
+            return
+        counts = self.counts.setdefault(category, {}).setdefault(site, [0, 0])
+        counts[0] += int(hit)
+        counts[1] += 1
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.counts, f)
+        os.replace(tmp, self.path)
+
+
 class ParserAgent:
-    def __init__(self, llm_integration=None):
+    def __init__(self, llm_integration=None, router: SiteRouter | None = None):
         # llm_integration can be a LangChain/LangGraph wrapper (optional)
         self.llm = llm_integration
+        self.router = router or SiteRouter()
 
     def _extract_price_max(self, text: str) -> int | None:
-        m = re.search(r"under\s*₹?(\d{1,3}(?:,?\d{3})*)", text.lower())
-        if not m:
-            m = re.search(r"under\s*(\d+)\s*k", text.lower())
-        if m:
-            num = m.group(1).replace(",", "")
-            try:
-                # If value is like '50k'
-                if num.lower().endswith("k"):
-                    return int(float(num[:-1]) * 1000)
-                return int(float(num))
-            except:
-                return None
-        return None
+        return _plan(normalize_query(text))["price_max"]
 
     def parse(self, query: str, override_sites: List[str] | None = None) -> Dict[str, Any]:
         # If we had an LLM: call it here to produce a Plan JSON with strict schema.
         # Fallback deterministic parse:
-        sites = override_sites or DEFAULT_SITES
-        price_max = self._extract_price_max(query) or None
+        plan = _plan(normalize_query(query))
         return {
-            "sites": sites,
-            "search_terms": query,
-            "filters": {"price_max": price_max},
+            "sites": override_sites or self.router.route(plan["category"]),
+            "search_terms": plan["search_terms"],
+            "category": plan["category"],
+            "brand": plan["brand"],
+            "attributes": dict(plan["attributes"]),
+            "filters": {"price_min": plan["price_min"], "price_max": plan["price_max"]},
             "fields": ["name", "price", "rating", "reviews", "link"],
             "top_k": 5
         }
+
+    def record(self, plan: Dict[str, Any], site: str, hit: bool):
+        """Feed a site's outcome for a plan (did it list anything) back into the routing table."""
+        self.router.record(plan.get("category"), site, hit)
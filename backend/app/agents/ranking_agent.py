@@ -1,6 +1,8 @@
 # app/agents/ranking_agent.py
-import math
-from typing import List, Dict
+from typing import List, Dict, Mapping, Sequence
+import msgspec
+import numpy as np
+from ..core.schemas import Listing
 
 DEFAULT_WEIGHTS = {
     "rating": 0.5,
@@ -8,38 +10,116 @@ DEFAULT_WEIGHTS = {
     "price": 0.25
 }
 
-def _normalize(v, vmin, vmax):
+# named weight profiles, selectable per request ("preference")
+PREFERENCE_PROFILES = {
+    "default": DEFAULT_WEIGHTS,
+    "budget": {"rating": 0.25, "reviews": 0.15, "price": 0.6},
+    "quality": {"rating": 0.65, "reviews": 0.25, "price": 0.1},
+    "popular": {"rating": 0.3, "reviews": 0.55, "price": 0.15},
+}
+
+_FEATURES = ("rating", "reviews", "price")
+
+
+def profile_weights(name: str | None) -> Dict[str, float]:
+    """Weights for a named preference profile; unknown names get the default."""
+    return PREFERENCE_PROFILES.get(name or "default", DEFAULT_WEIGHTS)
+
+
+def _column(items: List[Listing], key: str) -> np.ndarray:
+    # missing values become NaN so min/max can skip them
+    values = [getattr(it, key) for it in items]
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _normalize(v: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
     if vmax == vmin:
-        return 0.5
+        return np.full(v.shape, 0.5)
     return (v - vmin) / (vmax - vmin)
 
+
+def feature_matrix(price: np.ndarray, rating: np.ndarray, reviews: np.ndarray) -> np.ndarray:
+    """Normalized (3, n) features in _FEATURES order from columns with NaN for missing values.
+
+    Same scale as the old per-item loop: rating min-max, log1p(reviews) over
+    log1p(max reviews), and inverted min-max price so cheaper scores higher.
+    """
+    has_price, has_rating, has_reviews = ~np.isnan(price), ~np.isnan(rating), ~np.isnan(reviews)
+    pmin, pmax = (price[has_price].min(), price[has_price].max()) if has_price.any() else (0, 1)
+    rmin, rmax = (rating[has_rating].min(), rating[has_rating].max()) if has_rating.any() else (0, 5)
+
+    nr = _normalize(np.where(has_rating, rating, 0.0), rmin, rmax)
+    if has_reviews.any():
+        revmax = reviews[has_reviews].max()
+        # more reviews -> more confident
+        nrev = np.log1p(np.where(has_reviews, reviews, 0.0)) / (np.log1p(revmax) if revmax else 1)
+    else:
+        nrev = np.zeros(price.shape)
+    # lower price -> better
+    nprice = 1 - _normalize(np.where(has_price, price, 0.0), pmin, pmax)
+    return np.vstack((nr, nrev, nprice))
+
+
+def weight_matrix(profiles: Sequence[Mapping[str, float]]) -> np.ndarray:
+    return np.array([[w[f] for f in _FEATURES] for w in profiles], dtype=np.float64)
+
+
+def score_columns(price: np.ndarray, rating: np.ndarray, reviews: np.ndarray,
+                  profiles: Sequence[Mapping[str, float]]) -> np.ndarray:
+    """Score n items under every profile in one matrix product; returns a (len(profiles), n) array."""
+    return np.round(weight_matrix(profiles) @ feature_matrix(price, rating, reviews), 4)
+
+
+def top_k_indices(scores: np.ndarray, k: int | None = None) -> np.ndarray:
+    """Indices of the k best scores, best first; ties keep input order like a stable sort."""
+    n = scores.shape[0]
+    if k is None or k >= n:
+        candidates = np.arange(n)
+    else:
+        if k <= 0:
+            return np.arange(0)
+        # partial selection: everything scoring at least the k-th best, boundary ties included
+        kth = np.partition(-scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(-scores <= kth)
+    order = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return order[:k]
+
+
 class RankingAgent:
     def __init__(self, weights: dict | None = None):
         self.weights = weights or DEFAULT_WEIGHTS
 
-    def rank(self, items: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def _columns(items: List[Listing]):
+        return _column(items, "price"), _column(items, "rating"), _column(items, "reviews")
+
+    def rank(self, items: List[Listing], top_k: int | None = None, weights: dict | None = None) -> List[Listing]:
+        """Score items (setting "score") and return them best first, only the top_k when given."""
         if not items:
             return []
+        scores = score_columns(*self._columns(items), [weights or self.weights])[0]
+        ranked = []
+        for i in top_k_indices(scores, top_k):
+            it = items[i]
+            it.score = float(scores[i])
+            ranked.append(it)
+        return ranked
 
-        prices = [it["price"] for it in items if it.get("price") is not None]
-        ratings = [it["rating"] for it in items if it.get("rating") is not None]
-        reviews = [it["reviews"] for it in items if it.get("reviews") is not None]
-
-        pmin, pmax = (min(prices), max(prices)) if prices else (0, 1)
-        rmin, rmax = (min(ratings), max(ratings)) if ratings else (0, 5)
-        revmin, revmax = (min(reviews), max(reviews)) if reviews else (0, 1)
-
-        for it in items:
-            nr = _normalize(it.get("rating") or 0.0, rmin, rmax)
-            # more reviews -> more confident
-            nrev = (math.log1p(it.get("reviews") or 0) / (math.log1p(revmax) if revmax else 1)) if reviews else 0
-            # lower price -> better
-            nprice = 1 - _normalize(it.get("price") or 0.0, pmin, pmax)
-
-            score = (
-                self.weights["rating"] * nr +
-                self.weights["reviews"] * nrev +
-                self.weights["price"] * nprice
-            )
-            it["score"] = round(float(score), 4)
-        return sorted(items, key=lambda x: x.get("score", 0), reverse=True)
+    def rank_profiles(self, items: List[Listing], profiles: Mapping[str, Mapping[str, float]] | Sequence[str],
+                      top_k: int | None = None) -> Dict[str, List[Listing]]:
+        """Rank the same items under several weight profiles at once.
+
+        ``profiles`` is either {name: weights} or a list of PREFERENCE_PROFILES names.
+        Each ranking holds shallow copies carrying that profile's score, so the
+        rankings don't overwrite each other.
+        """
+        if not isinstance(profiles, Mapping):
+            profiles = {name: profile_weights(name) for name in profiles}
+        if not items:
+            return {name: [] for name in profiles}
+        names = list(profiles)
+        scores = score_columns(*self._columns(items), [profiles[n] for n in names])
+        return {
+            name: [msgspec.structs.replace(items[i], score=float(row[i])) for i in top_k_indices(row, top_k)]
+            for name, row in zip(names, scores)
+        }
@@ -1,6 +1,7 @@
 # app/agents/summarizer_agent.py
 from typing import List, Dict, Any
 import re
+from ..core.schemas import Listing
 
 class SummarizerAgent:
     def __init__(self, llm=None):
@@ -15,7 +16,10 @@ class SummarizerAgent:
             pros.append("NVMe/SSD storage (fast boot)")
         if re.search(r"\b(i5|ryzen 5|i7|ryzen 7)\b", n):
             pros.append("Strong CPU for price segment")
-        if "battery" in (specs or {}) and "mAh" in str(specs.get("battery")):
+        specs = specs or {}
+        # enriched spec keys are normalized table labels ("battery_capacity", "battery_power_rating")
+        battery = " ".join(str(v) for k, v in specs.items() if "battery" in k)
+        if "mAh" in battery:
             pros.append("Large battery")
         if "lightweight" in n or "light" in n:
             pros.append("Lightweight")
@@ -26,18 +30,16 @@ class SummarizerAgent:
             cons.append("Integrated graphics")
         return pros or ["Good value"], cons or ["Check exact specs on product page"]
 
-    def summarize_items(self, items: List[Dict]) -> List[Dict]:
+    def summarize_items(self, items: List[Listing]) -> List[Listing]:
         for it in items:
-            name = it.get("name", "")
-            specs = it.get("specs")
-            pros, cons = self._heuristic_pros_cons(name, specs)
-            it["pros"] = pros
-            it["cons"] = cons
-            it["one_line"] = f"{name} — {', '.join(pros[:2])}."
+            pros, cons = self._heuristic_pros_cons(it.name, it.specs)
+            it.pros = pros
+            it.cons = cons
+            it.one_line = f"{it.name} — {', '.join(pros[:2])}."
         return items
 
-    def overview(self, items: List[Dict]) -> str:
+    def overview(self, items: List[Listing]) -> str:
         if not items:
             return "No results found."
         top = items[0]
-        return f"Top recommendation: {top['name']} (score {top.get('score')})."
+        return f"Top recommendation: {top.name} (score {top.score})."
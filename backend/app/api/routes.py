@@ -1,18 +1,113 @@
 # app/api/routes.py
 from fastapi import APIRouter, HTTPException
-from app.core.schemas import QueryRequest, QueryResponse
+from fastapi.responses import StreamingResponse, Response
+from app.core.schemas import QueryRequest, QueryResponse, JobRequest, JobStatus
 from app.pipeline.orchestrator import Orchestrator
+from app.agents.parser_agent import SiteRouter
+from app.core import config
+from app.utils.cache import ResultCache, ProductCache, MemoryCacheBackend, SQLiteCacheBackend
+from app.utils.product_index import ProductIndex
+from app.utils.snapshot_store import SnapshotStore
+from app.utils.metrics import render_latest
+from app.utils.job_queue import JobQueue, Job, QueueFull
 import asyncio
+import msgspec
+
+def _build_cache() -> ResultCache | None:
+    if config.CACHE_BACKEND == "off":
+        return None
+    if config.CACHE_BACKEND == "sqlite":
+        backend = SQLiteCacheBackend(config.CACHE_PATH, max_bytes=config.CACHE_MAX_BYTES)
+    else:
+        backend = MemoryCacheBackend(max_bytes=config.CACHE_MAX_BYTES)
+    return ResultCache(backend, default_ttl=config.CACHE_DEFAULT_TTL, site_ttls=config.CACHE_SITE_TTLS,
+                       stale_ttl=config.CACHE_STALE_TTL)
 
 router = APIRouter()
-orchestrator = Orchestrator(concurrency=3)
+_cache = _build_cache()
+# global page-load cap follows the browser pool size once the lifespan attaches it
+orchestrator = Orchestrator(
+    parse_mode=config.PARSE_MODE,
+    parse_workers=config.PARSE_WORKERS,
+    parse_max_pending=config.PARSE_MAX_PENDING,
+    parse_timeout=config.PARSE_TIMEOUT,
+    cache=_cache,
+    # product specs share the listing cache's backend and size budget
+    product_cache=ProductCache(_cache.backend, ttl=config.PRODUCT_CACHE_TTL) if _cache else None,
+    enrich_concurrency=config.ENRICH_CONCURRENCY,
+    index=ProductIndex(config.PRODUCT_INDEX, fresh_ttl=config.INDEX_FRESH_TTL)
+    if config.PRODUCT_INDEX != "off" else None,
+    router=SiteRouter(path=config.ROUTING_STATS_PATH or None),
+    snapshots=SnapshotStore(config.SNAPSHOT_DIR, mode=config.SNAPSHOT_MODE)
+    if config.SNAPSHOT_MODE != "off" else None,
+)
+# heavy queries as background jobs; workers are started by the lifespan (see app/main.py)
+jobs = JobQueue(orchestrator.run, workers=config.JOB_WORKERS, max_backlog=config.JOB_MAX_BACKLOG,
+                timeout=config.JOB_TIMEOUT, retention=config.JOB_RETENTION)
+
+class MsgspecResponse(Response):
+    """JSON response encoded by msgspec: Listing structs go straight to bytes, no per-field re-validation.
+
+    Endpoints keep their response_model for the OpenAPI schema; FastAPI doesn't
+    validate a returned Response.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return msgspec.json.encode(content)
+
+def _job_status(job: Job, **extra) -> dict:
+    return dict(job.to_dict(), position=jobs.position(job), **extra)
 
 @router.post("/query", response_model=QueryResponse)
 async def handle_query(req: QueryRequest):
     try:
-        payload = req.dict()
-        result = await orchestrator.run(payload)
-        # Pydantic conversion will be handled by response_model
-        return result
+        result = await orchestrator.run(req.model_dump())
+        return MsgspecResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query/stream")
+async def handle_query_stream(req: QueryRequest):
+    """Same pipeline as /query, streamed as NDJSON: per-site items, re-ranked top-k snapshots, then the result."""
+    payload = req.model_dump()
+
+    async def events():
+        try:
+            async for event in orchestrator.run_stream(payload):
+                yield msgspec.json.encode(event) + b"\n"
+        except Exception as e:
+            yield msgspec.json.encode({"event": "error", "detail": str(e)}) + b"\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(req: JobRequest):
+    """Queue a query and return its job at once; poll GET /jobs/{id} for the result."""
+    payload = req.model_dump(exclude={"priority"})
+    try:
+        job, created = jobs.submit(payload, req.priority or "normal")
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return MsgspecResponse(_job_status(job, deduplicated=not created), status_code=202,
+                           headers={"Location": f"/jobs/{job.id}"})
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return MsgspecResponse(_job_status(job))
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    job = await jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return MsgspecResponse(_job_status(job))
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus exposition: per-stage latency histograms, cache lookups, escalations, items per site."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,63 @@
+# app/core/config.py
+import os
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# shared chromium pool (see app/utils/browser_pool.py)
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_CONTEXTS_PER_BROWSER = int(os.getenv("BROWSER_CONTEXTS_PER_BROWSER", "3"))
+BROWSER_MAX_PAGES_PER_CONTEXT = int(os.getenv("BROWSER_MAX_PAGES_PER_CONTEXT", "50"))
+BROWSER_MAX_PAGES_PER_BROWSER = int(os.getenv("BROWSER_MAX_PAGES_PER_BROWSER", "500"))
+BROWSER_HEALTH_INTERVAL = float(os.getenv("BROWSER_HEALTH_INTERVAL", "30"))
+# memory watchdog: a pooled browser whose process tree passes BROWSER_MAX_RSS_MB (0 disables) is
+# drained and relaunched; sampled every BROWSER_MEMORY_INTERVAL seconds
+BROWSER_MAX_RSS_MB = float(os.getenv("BROWSER_MAX_RSS_MB", "1500"))
+BROWSER_MEMORY_INTERVAL = float(os.getenv("BROWSER_MEMORY_INTERVAL", "10"))
+
+# offline HTML parsing pool (see app/utils/parse_pool.py): "process", "thread" or "inline"
+PARSE_MODE = os.getenv("PARSE_MODE", "process")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0")) or None
+PARSE_MAX_PENDING = int(os.getenv("PARSE_MAX_PENDING", "32"))
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT", "10"))
+
+# per-site listing cache (see app/utils/cache.py): "memory", "sqlite" or "off"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", "cache.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", "600"))
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "3600"))
+# fashion listings churn slower than electronics prices
+CACHE_SITE_TTLS = {
+    "amazon.in": float(os.getenv("CACHE_TTL_AMAZON", "600")),
+    "flipkart.com": float(os.getenv("CACHE_TTL_FLIPKART", "600")),
+    "myntra.com": float(os.getenv("CACHE_TTL_MYNTRA", "1800")),
+}
+
+# product detail enrichment (QueryRequest.enrich): detail pages fetched at once, and how long
+# a product's specs stay cached (they rarely change)
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "4"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", str(7 * 24 * 3600)))
+
+# local product index (see app/utils/product_index.py): sqlite path or "off"; a site's results for a
+# term are answered from it for INDEX_FRESH_TTL seconds, and the hottest terms are re-scraped every
+# INDEX_REFRESH_INTERVAL seconds
+PRODUCT_INDEX = os.getenv("PRODUCT_INDEX", "products.sqlite3")
+INDEX_FRESH_TTL = float(os.getenv("INDEX_FRESH_TTL", "1800"))
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", "300"))
+INDEX_HOT_TERMS = int(os.getenv("INDEX_HOT_TERMS", "20"))
+
+# learned per-category site hit rates for query routing (see ParserAgent/SiteRouter); saved on
+# shutdown, "" keeps them in memory only
+ROUTING_STATS_PATH = os.getenv("ROUTING_STATS_PATH", "routing_stats.json")
+
+# page snapshots (see app/utils/snapshot_store.py): "record" stores every fetched page under
+# SNAPSHOT_DIR, "replay" serves pages from there without a browser or network, "off" disables
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "off")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+
+# background jobs (POST /jobs): worker tasks, queued jobs before new ones get 503 + Retry-After,
+# per-job time limit and how long finished jobs stay pollable (seconds)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_BACKLOG = int(os.getenv("JOB_MAX_BACKLOG", "100"))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "120"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "600"))
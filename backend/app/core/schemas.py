@@ -1,26 +1,75 @@
 # app/core/schemas.py
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
+import msgspec
+
+class Listing(msgspec.Struct, gc=False):
+    """A product listing as it moves through the pipeline: site parsers -> dedup -> ranker -> summarizer.
+
+    Fixed slots instead of a dict per item, and msgspec.json encodes it straight to
+    bytes on the way out (see app/api/routes.py). ``Item`` below documents the
+    same shape in the OpenAPI schema. gc=False: listings only hold str/number
+    dicts and lists, never reference cycles, so the collector can skip them.
+    """
+    name: str
+    price: Optional[float] = None
+    rating: Optional[float] = None
+    reviews: Optional[int] = None
+    link: Optional[str] = None
+    source: Optional[str] = None
+    specs: Optional[Dict[str, Any]] = None
+    pros: Optional[List[str]] = None
+    cons: Optional[List[str]] = None
+    one_line: Optional[str] = None
+    score: Optional[float] = None
+    alternates: Optional[List[Dict[str, Any]]] = None  # same product elsewhere: name, price, rating, reviews, link, source
 
 class QueryRequest(BaseModel):
     query: str
     top_k: Optional[int] = 5
     sites: Optional[List[str]] = None  # override default sites
     headful: Optional[bool] = False    # open visible browser for debug
+    budget_ms: Optional[int] = None    # latency budget; answer with whichever sites finished in time
+    hedge: Optional[bool] = None       # send a second fetch when a site is past its p95 (server default if unset)
+    preference: Optional[str] = None   # ranking profile for "items" (see ranking_agent.PREFERENCE_PROFILES)
+    profiles: Optional[List[str]] = None  # extra rankings returned under "rankings", one per profile
+    enrich: Optional[bool] = False     # fetch product pages of the returned items to fill "specs"
+    debug_timings: Optional[bool] = False  # include per-stage timings in the response
 
 class Item(BaseModel):
     name: str
-    price: float
+    price: Optional[float] = None
     rating: Optional[float] = None
     reviews: Optional[int] = None
-    link: str
+    link: Optional[str] = None
     source: Optional[str] = None
     specs: Optional[Dict[str, Any]] = None
     pros: Optional[List[str]] = None
     cons: Optional[List[str]] = None
+    one_line: Optional[str] = None
     score: Optional[float] = None
+    alternates: Optional[List[Dict[str, Any]]] = None  # same product elsewhere: name, price, rating, reviews, link, source
 
 class QueryResponse(BaseModel):
     query: str
     items: List[Item]
     summary: Optional[str] = None
+    cache: Optional[Dict[str, Dict[str, Any]]] = None  # site -> {"hit", "stale", "age"} (+ "source": "index")
+    timed_out_sites: Optional[List[str]] = None
+    rankings: Optional[Dict[str, List[Item]]] = None  # profile -> top-k items scored with that profile
+    timings: Optional[List[Dict[str, Any]]] = None  # [{"stage", "site", "ms", "outcome"}] when debug_timings
+
+class JobRequest(QueryRequest):
+    priority: Optional[Literal["high", "normal", "low"]] = "normal"  # queue class; low is shed first under load
+
+class JobStatus(BaseModel):
+    id: str
+    status: str                         # queued | running | done | failed | cancelled
+    priority: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    position: Optional[int] = None      # jobs ahead of this one while queued
+    deduplicated: Optional[bool] = None  # on submit: an identical job was already queued or running
+    result: Optional[QueryResponse] = None
+    error: Optional[str] = None
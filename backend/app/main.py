@@ -1,11 +1,55 @@
 # backend/app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
-from playwright.async_api import async_playwright
+from app.api.routes import router, orchestrator, jobs
+from app.core import config
+from app.agents.navigator_agent import extract_rows
+from app.sites import amazon
+from app.agents.ranking_agent import RankingAgent, profile_weights
+from app.utils.browser_pool import BrowserPool
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one warm chromium pool per worker process, shared by /query and /api/search;
+    # a snapshot replay serves every page from disk and needs no browser at all
+    if orchestrator.replaying:
+        app.state.browser_pool = None
+        jobs.start()
+        try:
+            yield
+        finally:
+            await jobs.stop()
+            await orchestrator.shutdown()
+        return
+    pool = BrowserPool(
+        size=config.BROWSER_POOL_SIZE,
+        contexts_per_browser=config.BROWSER_CONTEXTS_PER_BROWSER,
+        user_agent=config.DEFAULT_USER_AGENT,
+        max_pages_per_context=config.BROWSER_MAX_PAGES_PER_CONTEXT,
+        max_pages_per_browser=config.BROWSER_MAX_PAGES_PER_BROWSER,
+        health_interval=config.BROWSER_HEALTH_INTERVAL,
+        max_rss_mb=config.BROWSER_MAX_RSS_MB,
+        memory_interval=config.BROWSER_MEMORY_INTERVAL,
+    )
+    await pool.start()
+    app.state.browser_pool = pool
+    orchestrator.browser_pool = pool
+    orchestrator.start_refresher(config.INDEX_REFRESH_INTERVAL, config.INDEX_HOT_TERMS)
+    jobs.start()
+    try:
+        yield
+    finally:
+        # running jobs are cancelled before the browsers they use go away
+        await jobs.stop()
+        orchestrator.browser_pool = None
+        await pool.stop()
+        await orchestrator.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(router)
 
 # CORS for frontend
 app.add_middleware(
@@ -29,33 +73,50 @@ class ProductResult(BaseModel):
     link: str
     image: str
 
-async def scrape_amazon(query: str) -> List[dict]:
+ranker = RankingAgent()
+
+async def scrape_amazon(pool: BrowserPool, query: str, preference: str = "default") -> List[dict]:
     results = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        search_url = f"https://www.amazon.in/s?k={query.replace(' ', '+')}"
-        await page.goto(search_url)
-
-        # Grab first 5 results
-        items = await page.query_selector_all("div.s-main-slot div[data-asin]:has(h2)")
-        for item in items[:5]:
-            title = await item.query_selector_eval("h2 a span", "el => el.textContent") if await item.query_selector("h2 a span") else "N/A"
-            price = await item.query_selector_eval(".a-price-whole", "el => el.textContent") if await item.query_selector(".a-price-whole") else "N/A"
-            link = await item.query_selector_eval("h2 a", "el => el.href") if await item.query_selector("h2 a") else "#"
-            image = await item.query_selector_eval("img.s-image", "el => el.src") if await item.query_selector("img.s-image") else ""
-            results.append({
-                "name": title.strip(),
-                "price": f"₹{price.strip()}" if price != "N/A" else "N/A",
-                "rating": 0,  # Amazon rating scraping can be added
-                "specifications": [],
-                "link": link,
-                "image": image
-            })
-        await browser.close()
+    async with pool.context() as context:
+        page = await context.new_page()
+        try:
+            search_url = f"https://www.amazon.in/s?k={query.replace(' ', '+')}"
+            await page.goto(search_url)
+
+            # Grab the first 10 results in one evaluate using amazon's declared layout, keep the best 5
+            rows = await extract_rows(page, amazon.LISTING_LAYOUTS, limit=10)
+            items, raw = [], {}
+            for row in rows:
+                item = amazon.build_item(row)
+                if item:
+                    raw[id(item)] = row
+                    items.append(item)
+            for item in ranker.rank(items, top_k=5, weights=profile_weights(preference)):
+                row = raw[id(item)]
+                results.append({
+                    "name": item.name,
+                    "price": f"₹{row['price_whole']}" if row.get("price_whole") else "N/A",
+                    "rating": item.rating or 0,
+                    "specifications": [],
+                    "link": item.link,
+                    "image": row.get("image") or ""
+                })
+        finally:
+            await page.close()
     return results
 
+@app.get("/api/pool")
+async def pool_stats(request: Request):
+    """Per-browser pages served, RSS and recycle counts of this worker's browser pool, plus the share
+    of HTTP-tier fetches per site that still needed a browser page."""
+    pool = request.app.state.browser_pool
+    if pool is None:
+        raise HTTPException(status_code=503, detail="no browser pool (snapshot replay mode)")
+    return {**pool.stats(), "http_escalation_rates": orchestrator.escalation_rates()}
+
 @app.post("/api/search")
-async def search(req: SearchRequest):
-    products = await scrape_amazon(req.query)
+async def search(req: SearchRequest, request: Request):
+    if request.app.state.browser_pool is None:
+        raise HTTPException(status_code=503, detail="no browser pool (snapshot replay mode)")
+    products = await scrape_amazon(request.app.state.browser_pool, req.query, req.preference)
     return {"summary": f"Found {len(products)} products for {req.query}", "products": products}
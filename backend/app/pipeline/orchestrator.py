@@ -1,13 +1,34 @@
 # app/pipeline/orchestrator.py
 import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import nullcontext
 from typing import List, Dict
-from ..agents.parser_agent import ParserAgent
-from ..agents.navigator_agent import NavigatorAgent
+import httpx
+import msgspec
+from ..agents.parser_agent import ParserAgent, SiteRouter
+from ..agents.navigator_agent import NavigatorAgent, BlockedError
 from ..agents.extractor_agent import ExtractorAgent
-from ..agents.ranking_agent import RankingAgent
+from ..agents.http_agent import HttpAgent
+from ..agents.dedup_agent import DedupAgent
+from ..agents.ranking_agent import RankingAgent, profile_weights
 from ..agents.summarizer_agent import SummarizerAgent
 from ..sites import amazon, flipkart, myntra
-from ..core.schemas import Item
+from ..core.schemas import Listing
+from ..core.config import DEFAULT_USER_AGENT
+from ..utils.browser_pool import BrowserPool
+from ..utils.parse_pool import ParsePool
+from ..utils.cache import ResultCache, ProductCache
+from ..utils.product_index import ProductIndex
+from ..utils.snapshot_store import SnapshotStore
+from ..utils.singleflight import SingleFlight
+from ..utils.latency import LatencyTracker
+from ..utils.rate_limit import DomainLimiter
+from ..utils.metrics import span, collect_timings, ITEMS_EXTRACTED, CACHE_LOOKUPS, FETCH_ESCALATIONS
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
 
 # site -> search_url mapping
 SITE_URL_BUILDERS = {
@@ -23,67 +44,593 @@ SITE_WAIT_SELECTORS = {
     "myntra.com": "li.product-base"
 }
 
+# site -> result card selector (scrolling stops once enough of these are on the page)
+SITE_CARD_SELECTORS = {
+    "amazon.in": amazon.CARD_SELECTOR,
+    "flipkart.com": flipkart.CARD_SELECTOR,
+    "myntra.com": myntra.CARD_SELECTOR
+}
+
+# site -> extra hosts to abort while fetching (on top of the navigator's tracker list)
+SITE_BLOCKED_HOSTS = {
+    "amazon.in": amazon.BLOCKED_HOSTS,
+    "flipkart.com": flipkart.BLOCKED_HOSTS,
+    "myntra.com": myntra.BLOCKED_HOSTS
+}
+
+# site -> captcha/block page markers (tell "blocked" apart from "no results")
+SITE_BLOCK_MARKERS = {
+    "amazon.in": amazon.BLOCK_MARKERS,
+    "flipkart.com": flipkart.BLOCK_MARKERS,
+    "myntra.com": myntra.BLOCK_MARKERS
+}
+
+# site -> politeness limits: token bucket (rate/s, burst) and AIMD concurrency (initial, max,
+# and the navigation latency in seconds above which we back off)
+SITE_RATE_LIMITS = {
+    "amazon.in": {"rate": 2.0, "burst": 4, "initial": 2, "max_concurrency": 6, "latency_target": 10.0},
+    "flipkart.com": {"rate": 1.0, "burst": 3, "initial": 2, "max_concurrency": 4, "latency_target": 12.0},
+    "myntra.com": {"rate": 1.0, "burst": 3, "initial": 2, "max_concurrency": 4, "latency_target": 12.0},
+}
+DEFAULT_RATE_LIMIT = {"rate": 1.0, "burst": 2, "initial": 1, "max_concurrency": 2, "latency_target": None}
+# replayed pages come off local disk; politeness limits would only slow a load test down
+REPLAY_RATE_LIMIT = {"rate": 1000.0, "burst": 1000, "initial": 64, "max_concurrency": 64, "latency_target": None}
+
+# site -> how listings are fetched: "http" tries a plain pooled HTTP GET first and escalates to a
+# browser page when it yields too few cards; "browser" always navigates
+SITE_FETCH_STRATEGIES = {
+    "amazon.in": "http",
+    "flipkart.com": "browser",
+    "myntra.com": "browser"
+}
+
+# site -> selector marking a loaded product detail page (enrichment)
+SITE_DETAIL_WAIT_SELECTORS = {
+    "amazon.in": amazon.DETAIL_WAIT_SELECTOR,
+    "flipkart.com": flipkart.DETAIL_WAIT_SELECTOR,
+    "myntra.com": myntra.DETAIL_WAIT_SELECTOR
+}
+
+# site -> declarative card/field layouts for in-browser extraction (app/sites/spec.py)
+SITE_LISTING_LAYOUTS = {
+    "amazon.in": amazon.LISTING_LAYOUTS,
+    "flipkart.com": flipkart.LISTING_LAYOUTS,
+    "myntra.com": myntra.LISTING_LAYOUTS
+}
+
+def _qualifies(item: Listing, price_max: int | None, price_min: int | None = None) -> bool:
+    if not price_max and not price_min:
+        return True
+    price = item.price
+    if not price:
+        return False
+    return (not price_max or price <= price_max) and (not price_min or price >= price_min)
+
 class Orchestrator:
-    def __init__(self, concurrency: int = 3):
-        self.parser = ParserAgent()
-        self.extractor = ExtractorAgent()
+    def __init__(self, concurrency: int | None = None, browser_pool: BrowserPool | None = None, block_resources: bool = True,
+                 extraction_mode: str = "dom", parse_mode: str = "process", parse_workers: int | None = None,
+                 parse_max_pending: int = 32, parse_timeout: float | None = 10.0, cache: ResultCache | None = None,
+                 hedge: bool = False, hedge_quantile: float = 0.95, http_tier: bool = True,
+                 fetch_strategies: Dict[str, str] | None = None, url_builders: Dict | None = None,
+                 dedup: bool = True, max_pages: int = 3, product_cache: ProductCache | None = None,
+                 enrich_concurrency: int = 4, index: ProductIndex | None = None, router: SiteRouter | None = None,
+                 snapshots: SnapshotStore | None = None):
+        # global cap on concurrent page loads; None sizes it to the browser pool's capacity
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency or 3)
+        # browser_pool is usually attached later by the FastAPI lifespan (see app/main.py)
+        self.browser_pool = browser_pool
+        self.block_resources = block_resources
+        # "dom": read cards in-browser with one page.evaluate; "html": page.content() + the lxml parsers
+        self.extraction_mode = extraction_mode
+        # query planner; routes each query to the sites its category usually gets results from
+        self.parser = ParserAgent(router=router)
+        # offline HTML parsing runs in a process/thread pool instead of on the event loop
+        self.parse_pool = ParsePool(mode=parse_mode, workers=parse_workers, max_pending=parse_max_pending,
+                                    timeout=parse_timeout)
+        self.extractor = ExtractorAgent(pool=self.parse_pool)
         self.ranker = RankingAgent()
+        # cross-site near-duplicate clustering before ranking; None keeps every listing
+        self.dedup = DedupAgent() if dedup else None
         self.summarizer = SummarizerAgent()
-        self.semaphore = asyncio.Semaphore(concurrency)
+        # fetched pages are recorded to / replayed from this store (see app/utils/snapshot_store.py)
+        self.snapshots = snapshots
+        self.replaying = snapshots is not None and snapshots.replay
+        # cheap HTTP tier in front of the browser for sites whose strategy is "http"; never hit the network in replay
+        self.http = HttpAgent(user_agent=DEFAULT_USER_AGENT) if http_tier and not self.replaying else None
+        self.fetch_strategies = fetch_strategies or SITE_FETCH_STRATEGIES
+        # site -> search url builder; overridable to point at a mock storefront (see benchmarks/)
+        self.url_builders = url_builders or SITE_URL_BUILDERS
+        # site -> {"http": attempts, "escalated": fell back to the browser}
+        self.fetch_stats = defaultdict(lambda: {"http": 0, "escalated": 0})
+        # per-domain token buckets + adaptive concurrency, created on first use
+        self.domain_limiters: Dict[str, DomainLimiter] = {}
+        # per-site listing cache; None disables caching
+        self.cache = cache
+        # identical concurrent site fetches (same url) share one navigation
+        self.inflight = SingleFlight()
+        # per-site navigation latency; a fetch slower than hedge_quantile gets a second (hedged) fetch
+        self.latency = LatencyTracker()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        # result pages fetched per site, stopping early once enough items qualify
+        self.max_pages = max_pages
+        # detail-page enrichment of the final top-k: own page budget, specs cached per product link
+        self.enrich_semaphore = asyncio.Semaphore(enrich_concurrency)
+        self.product_cache = product_cache
+        # local FTS index of every scraped listing; answers sites whose data for a term is fresh
+        self.index = index
+        self._refresher: asyncio.Task | None = None
 
-    async def _fetch_and_extract(self, nav: NavigatorAgent, site: str, term: str, price_max: int | None, top_k_per_site: int):
-        url_builder = SITE_URL_BUILDERS.get(site)
-        url = url_builder(term, price_max) if url_builder else term
-        wait_selector = SITE_WAIT_SELECTORS.get(site)
-        async with self.semaphore:
-            try:
-                html = await nav.fetch_listing_html(url, wait_for_selector=wait_selector)
-            except Exception as e:
-                print(f"Navigator failed for {site}: {e}")
+    @property
+    def browser_pool(self) -> BrowserPool | None:
+        return self._browser_pool
+
+    @browser_pool.setter
+    def browser_pool(self, pool: BrowserPool | None):
+        self._browser_pool = pool
+        if self.concurrency is None:
+            self.semaphore = asyncio.Semaphore(pool.capacity if pool is not None else 3)
+
+    def _domain_limiter(self, site: str) -> DomainLimiter:
+        limiter = self.domain_limiters.get(site)
+        if limiter is None:
+            limits = REPLAY_RATE_LIMIT if self.replaying else SITE_RATE_LIMITS.get(site, DEFAULT_RATE_LIMIT)
+            limiter = DomainLimiter(**limits)
+            self.domain_limiters[site] = limiter
+        return limiter
+
+    async def _fetch_and_extract(self, nav: NavigatorAgent, site: str, term: str, price_max: int | None,
+                                 top_k_per_site: int, use_cache: bool = True, deadline: float | None = None,
+                                 hedge: bool = False, price_min: int | None = None):
+        """Return (items, cache_meta, outcome) for one site: product index, then result cache, then a scrape.
+
+        ``outcome`` is what a scrape actually saw (see _scrape); {} when the items came from the index or cache.
+        """
+        outcome = {}
+        # a replay is for re-running extraction over the recorded pages, not for serving old results
+        use_cache = use_cache and not self.replaying
+        with span("fetch", site):
+            if self.index is not None and use_cache:
+                with span("index_lookup", site):
+                    items, age = await self.index.lookup_async(site, term, price_max, top_k_per_site, price_min)
+                if items is not None:
+                    CACHE_LOOKUPS.labels(site, "index").inc()
+                    return items, {"hit": True, "stale": False, "age": round(age, 1), "source": "index"}, outcome
+            if self.cache is None or not use_cache:
+                items, meta = await self._scrape(nav, site, term, price_max, top_k_per_site, deadline, hedge,
+                                                 price_min, outcome), None
+            else:
+                items, meta = await self.cache.get_or_fetch(
+                    site, term, price_max, top_k_per_site,
+                    fetch=lambda: self._scrape(nav, site, term, price_max, top_k_per_site, deadline, hedge, price_min,
+                                               outcome),
+                    refresh=lambda: self._background_scrape(site, term, price_max, top_k_per_site, price_min),
+                    price_min=price_min,
+                )
+                result = "miss" if not meta["hit"] else "stale" if meta["stale"] else "hit"
+                CACHE_LOOKUPS.labels(site, result).inc()
+        ITEMS_EXTRACTED.labels(site).inc(len(items))
+        return items, meta, outcome
+
+    async def _background_scrape(self, site: str, term: str, price_max: int | None, top_k_per_site: int,
+                                 price_min: int | None = None):
+        # runs after the originating request may have finished, so it can't borrow that request's navigator
+        if self.browser_pool is not None:
+            nav = NavigatorAgent(pool=self.browser_pool, snapshots=self.snapshots)
+        else:
+            nav = NavigatorAgent(user_agent=DEFAULT_USER_AGENT, snapshots=self.snapshots)
+        async with nav:
+            return await self._scrape(nav, site, term, price_max, top_k_per_site, price_min=price_min)
+
+    async def _scrape(self, nav: NavigatorAgent, site: str, term: str, price_max: int | None, top_k_per_site: int,
+                      deadline: float | None = None, hedge: bool = False, price_min: int | None = None,
+                      outcome: Dict | None = None):
+        """Fetch result pages 1..max_pages concurrently until top_k_per_site items qualify.
+
+        At most the site's current adaptive concurrency limit of pages is in flight;
+        no further page is started once enough items within ``price_min``..``price_max``
+        have come in, or after a page that added nothing new (past the last page, or blocked).
+        A given ``outcome`` dict gets "fetched" (some page actually loaded) and "cards"
+        (listings seen on the loaded pages, in or out of the price range).
+        """
+        outcome = {} if outcome is None else outcome
+        outcome.update(fetched=False, cards=0)
+        url_builder = self.url_builders.get(site)
+        if url_builder is None:
+            items = await self._scrape_page(nav, site, term, top_k_per_site, deadline, hedge)
+            if items is None:
                 return []
-        items = self.extractor.extract(site, html, top_k=top_k_per_site)
+            outcome.update(fetched=True, cards=len(items))
+            return [it for it in items if _qualifies(it, price_max, price_min)][:top_k_per_site]
+        pages: Dict[int, List[Listing]] = {}
+        running: Dict[asyncio.Task, int] = {}
+        seen = set()
+        qualifying = 0
+        next_page, last_page = 1, self.max_pages
+        try:
+            while True:
+                window = max(1, self._domain_limiter(site).limiter.limit)
+                while next_page <= last_page and len(running) < window and qualifying < top_k_per_site:
+                    url = url_builder(term, price_max, page=next_page)
+                    task = asyncio.create_task(self._scrape_page(nav, site, url, top_k_per_site, deadline, hedge))
+                    running[task] = next_page
+                    next_page += 1
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = running.pop(task)
+                    fresh = []
+                    result = task.result()
+                    if result is not None:
+                        outcome["fetched"] = True
+                    for it in result or ():
+                        key = it.link or it.name
+                        if key and key not in seen:
+                            seen.add(key)
+                            fresh.append(it)
+                    if not fresh:
+                        last_page = min(last_page, page)
+                    pages[page] = fresh
+                    outcome["cards"] += len(fresh)
+                    qualifying += sum(1 for it in fresh if _qualifies(it, price_max, price_min))
+                if qualifying >= top_k_per_site:
+                    break
+        finally:
+            for task in running:
+                task.cancel()
+        # page order is relevance order; keep it regardless of which page landed first
+        items = [it for page in sorted(pages) for it in pages[page]
+                 if _qualifies(it, price_max, price_min)][:top_k_per_site]
+        if self.index is not None and not self.replaying:
+            await self.index.upsert_async(site, term, price_max, top_k_per_site, items, price_min)
         return items
 
-    async def run(self, request: dict):
-        query = request["query"]
-        top_k = request.get("top_k", 5)
-        parsed = self.parser.parse(query, override_sites=request.get("sites"))
-        term = parsed["search_terms"]
-        price_max = parsed["filters"].get("price_max")
+    async def _scrape_page(self, nav: NavigatorAgent, site: str, url: str, top_k_per_site: int,
+                           deadline: float | None = None, hedge: bool = False):
+        if nav.pool is None:
+            # a dedicated (headful) browser belongs to one request and can't serve others
+            return await self._hedged_fetch(nav, site, url, top_k_per_site, deadline, hedge)
+        # The shared fetch gets its own pooled navigator so it outlives whichever caller started it.
+        # It runs without a deadline: each caller stops waiting at its own deadline, and the fetch is
+        # cancelled once the last one has.
+        items = await self.inflight.do(
+            (url, top_k_per_site),
+            lambda: self._hedged_fetch(NavigatorAgent(pool=nav.pool, snapshots=nav.snapshots), site, url, top_k_per_site, None, hedge),
+        )
+        # every waiter gets the same list back, and ranking/dedup/summarizing set fields on the items:
+        # each caller works on its own copies
+        return None if items is None else [msgspec.structs.replace(it) for it in items]
 
-        sites = parsed.get("sites", ["amazon.in", "flipkart.com", "myntra.com"])
-        per_site_k = max(8, top_k * 2)  # fetch more then reduce
+    async def _hedged_fetch(self, nav: NavigatorAgent, site: str, url: str, top_k_per_site: int,
+                            deadline: float | None = None, hedge: bool = False):
+        threshold = self.latency.quantile(site, self.hedge_quantile) if hedge else None
+        if threshold is None:
+            return await self._navigate_and_extract(nav, site, url, top_k_per_site, deadline)
+        primary = asyncio.create_task(self._navigate_and_extract(nav, site, url, top_k_per_site, deadline))
+        racers = {primary}
+        try:
+            done, _ = await asyncio.wait(racers, timeout=threshold)
+            if done:
+                return primary.result()
+            # slower than this site's usual p95: race a second fetch against it
+            racers.add(asyncio.create_task(self._navigate_and_extract(nav, site, url, top_k_per_site, deadline)))
+            loaded = None
+            while racers:
+                done, racers = await asyncio.wait(racers, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    items = task.result()
+                    if items:
+                        return items
+                    # a failed fetch returns None, a page without cards []; keep waiting on the other one
+                    if items is not None:
+                        loaded = items
+            return loaded
+        finally:
+            for task in racers:
+                task.cancel()
 
-        # Navigator context
-        headless = not request.get("headful", False)
-        nav = NavigatorAgent(headless=headless, user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        results = []
-        async with nav:
-            tasks = [ self._fetch_and_extract(nav, s, term, price_max, per_site_k) for s in sites ]
-            done = await asyncio.gather(*tasks, return_exceptions=True)
-            for res in done:
-                if isinstance(res, Exception):
-                    print("site task error", res)
-                else:
-                    results.extend(res)
+    async def _navigate_and_extract(self, nav: NavigatorAgent, site: str, url: str, top_k_per_site: int,
+                                    deadline: float | None = None):
+        """Items on one result page (every card), or None when neither tier could load it."""
+        http_items = None
+        # domain slot first, so a throttled site waits without holding a global page slot
+        async with self._domain_limiter(site).slot() as limiter:
+            if self.http is not None and self.fetch_strategies.get(site) == "http":
+                http_items = await self._http_extract(limiter, site, url, top_k_per_site, deadline)
+                self.fetch_stats[site]["http"] += 1
+                if http_items is not None and len(http_items) >= top_k_per_site:
+                    return http_items
+                # too few cards without JavaScript: escalate to a browser page
+                self.fetch_stats[site]["escalated"] += 1
+                FETCH_ESCALATIONS.labels(site).inc()
+            async with self.semaphore:
+                fetched = await self._browser_fetch(limiter, nav, site, url, top_k_per_site, deadline)
+        if fetched is None:
+            return http_items
+        # every card on the page: the caller filters by price before counting, and a qualifying
+        # card past the first top_k_per_site would otherwise cost another page fetch
+        if fetched["rows"]:
+            items = self.extractor.extract_rows(site, fetched["rows"], top_k=None)
+        else:
+            # no cards matched in the browser (or html mode): fall back to parsing the page offline
+            items = await self.extractor.extract_async(site, fetched["html"], top_k=None)
+        return items if http_items is None or len(items) >= len(http_items) else http_items
+
+    async def _http_extract(self, limiter, site: str, url: str, top_k_per_site: int, deadline: float | None = None):
+        started = time.monotonic()
+        timeout = None if deadline is None else max(0.1, deadline - started)
+        try:
+            with span("http_fetch", site):
+                html = await self.http.fetch_html(url, timeout=timeout)
+        except (BlockedError, httpx.TimeoutException) as e:
+            limiter.on_overload()
+            logger.warning("HTTP fetch failed for %s: %s", site, e)
+            return None
+        except Exception as e:
+            logger.warning("HTTP fetch failed for %s: %s", site, e)
+            return None
+        limiter.on_success(time.monotonic() - started)
+        if self.snapshots is not None:
+            await self.snapshots.put_async(url, html)
+        return await self.extractor.extract_async(site, html, top_k=None)
+
+    async def _browser_fetch(self, limiter, nav: NavigatorAgent, site: str, url: str, top_k_per_site: int,
+                             deadline: float | None = None):
+        started = time.monotonic()
+        try:
+            fetched = await nav.fetch_listing(
+                url,
+                layouts=SITE_LISTING_LAYOUTS.get(site) if self.extraction_mode == "dom" else None,
+                wait_for_selector=SITE_WAIT_SELECTORS.get(site),
+                card_selector=SITE_CARD_SELECTORS.get(site),
+                min_cards=top_k_per_site,
+                block_resources=self.block_resources,
+                blocked_hosts=SITE_BLOCKED_HOSTS.get(site, ()),
+                deadline=deadline,
+                block_markers=SITE_BLOCK_MARKERS.get(site, ()),
+                site=site,
+            )
+        except (BlockedError, PlaywrightTimeoutError) as e:
+            # the site is pushing back or struggling: shrink its concurrency
+            limiter.on_overload()
+            logger.warning("Navigator failed for %s: %s", site, e)
+            return None
+        except Exception as e:
+            logger.warning("Navigator failed for %s: %s", site, e)
+            return None
+        elapsed = time.monotonic() - started
+        self.latency.observe(site, elapsed)
+        limiter.on_success(elapsed)
+        return fetched
+
+    async def _enrich(self, nav: NavigatorAgent, items: List[Listing], deadline: float | None = None):
+        """Fill item.specs from each item's product page; items still missing specs at the deadline stay as is."""
+        by_link: Dict[str, List[Listing]] = defaultdict(list)
+        for it in items:
+            if it.link and not it.specs:
+                by_link[it.link].append(it)
+        tasks = [asyncio.create_task(self._item_specs(nav, same, deadline)) for same in by_link.values()]
+        if not tasks:
+            return
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        with span("enrich"):
+            _, pending = await asyncio.wait(tasks, timeout=remaining)
+        for task in pending:
+            task.cancel()
+
+    async def _item_specs(self, nav: NavigatorAgent, items: List[Listing], deadline: float | None = None):
+        # items: the same product (link) as it appears in the main and per-profile rankings
+        link, site = items[0].link, items[0].source or ""
+        specs = await self.product_cache.get_async(link) if self.product_cache is not None else None
+        if specs is None:
+            try:
+                specs = await self._fetch_specs(nav, site, link, deadline)
+            except Exception as e:
+                logger.warning("Detail fetch failed for %s: %s", link, e)
+                return
+            if self.product_cache is not None:
+                await self.product_cache.set_async(link, specs)
+        if specs:
+            for it in items:
+                it.specs = specs
+
+    async def _fetch_specs(self, nav: NavigatorAgent, site: str, url: str, deadline: float | None = None):
+        # detail pages count against the site's politeness limits like listing pages do
+        async with self._domain_limiter(site).slot() as limiter, self.enrich_semaphore:
+            started = time.monotonic()
+            try:
+                if self.http is not None and self.fetch_strategies.get(site) == "http":
+                    timeout = None if deadline is None else max(0.1, deadline - started)
+                    with span("detail_http", site):
+                        html = await self.http.fetch_html(url, timeout=timeout)
+                    if self.snapshots is not None:
+                        await self.snapshots.put_async(url, html, kind="detail")
+                    specs = await self.extractor.extract_specs_async(site, html)
+                    if specs:
+                        limiter.on_success(time.monotonic() - started)
+                        return specs
+                html = await nav.fetch_detail_html(
+                    url,
+                    wait_for_selector=SITE_DETAIL_WAIT_SELECTORS.get(site),
+                    block_resources=self.block_resources,
+                    blocked_hosts=SITE_BLOCKED_HOSTS.get(site, ()),
+                    deadline=deadline,
+                    block_markers=SITE_BLOCK_MARKERS.get(site, ()),
+                    site=site,
+                )
+            except (BlockedError, PlaywrightTimeoutError, httpx.TimeoutException):
+                limiter.on_overload()
+                raise
+            limiter.on_success(time.monotonic() - started)
+        return await self.extractor.extract_specs_async(site, html)
+
+    def escalation_rates(self) -> Dict[str, float]:
+        """Share of HTTP-tier fetches per site that had to fall back to a browser page."""
+        return {site: (st["escalated"] / st["http"]) if st["http"] else 0.0 for site, st in self.fetch_stats.items()}
+
+    async def refresh_hot_terms(self, limit: int = 20):
+        """Re-scrape the hottest index terms that are stale or about to be."""
+        if self.index is None:
+            return
+        hot = await asyncio.to_thread(self.index.hot_terms, limit)
+        results = await asyncio.gather(
+            *[self._background_scrape(site, term, price_max, top_k, price_min)
+              for site, term, price_max, price_min, top_k in hot],
+            return_exceptions=True,
+        )
+        for (site, term, *_), result in zip(hot, results):
+            if isinstance(result, Exception):
+                logger.warning("index refresh failed for %s %r: %s", site, term, result)
+        await asyncio.to_thread(self.index.prune)
+
+    def start_refresher(self, interval: float = 300.0, limit: int = 20):
+        """Keep hot index terms fresh in the background until shutdown()."""
+        if self.index is None or self._refresher is not None:
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.refresh_hot_terms(limit)
+                except Exception as e:
+                    logger.warning("index refresher pass failed: %s", e)
 
+        self._refresher = asyncio.create_task(_loop())
+
+    async def shutdown(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        self.parse_pool.shutdown()
+        self.parser.router.save()
+        if self.http is not None:
+            await self.http.aclose()
+
+    def _dedupe(self, items: List[Listing]) -> List[Listing]:
+        if self.dedup is None:
+            return items
+        with span("dedup"):
+            return self.dedup.dedupe(items)
+
+    def _add_unique(self, items: List[Listing], seen: set, unique: List[Listing]):
         # dedupe by link
-        seen = set()
-        unique = []
-        for it in results:
-            link = it.get("link")
-            key = link or it.get("name")
+        for it in items:
+            key = it.link or it.name
             if not key or key in seen:
                 continue
             seen.add(key)
             unique.append(it)
 
-        ranked = self.ranker.rank(unique)
-        trimmed = ranked[:top_k]
-        summarized = self.summarizer.summarize_items(trimmed)
-        summary_text = self.summarizer.overview(summarized)
-        return {
-            "query": query,
-            "items": summarized,
-            "summary": summary_text
-        }
+    async def run(self, request: dict):
+        """Run the whole pipeline and return the QueryResponse-shaped result."""
+        result = None
+        async for event in self.run_stream(request, snapshots=False):
+            if event["event"] == "done":
+                result = event["result"]
+        return result
+
+    async def run_stream(self, request: dict, snapshots: bool = True):
+        """Run the pipeline, yielding events as sites finish.
+
+        Yields a {"event": "site"} and a re-ranked {"event": "ranking"} per finished site (when ``snapshots``),
+        then {"event": "done", "result": <QueryResponse dict>} built from whatever finished within ``budget_ms``.
+        """
+        query = request["query"]
+        top_k = request.get("top_k", 5)
+        budget_ms = request.get("budget_ms")
+        deadline = time.monotonic() + budget_ms / 1000 if budget_ms else None
+        hedge = self.hedge if request.get("hedge") is None else request["hedge"]
+        weights = profile_weights(request.get("preference"))
+        with collect_timings() if request.get("debug_timings") else nullcontext() as timings:
+            with span("total"):
+                with span("parse_query"):
+                    parsed = self.parser.parse(query, override_sites=request.get("sites"))
+                term = parsed["search_terms"]
+                price_max = parsed["filters"].get("price_max")
+                price_min = parsed["filters"].get("price_min")
+
+                sites = parsed.get("sites", ["amazon.in", "flipkart.com", "myntra.com"])
+                per_site_k = max(8, top_k * 2)  # fetch more then reduce
+
+                # Navigator context: shared pool unless a visible (debug) browser was asked for
+                headless = not request.get("headful", False)
+                if headless and self.browser_pool is not None:
+                    nav = NavigatorAgent(pool=self.browser_pool, snapshots=self.snapshots)
+                else:
+                    nav = NavigatorAgent(headless=headless, user_agent=DEFAULT_USER_AGENT, snapshots=self.snapshots)
+                seen = set()
+                unique = []
+                cache_meta = {}
+                timed_out = []
+                async with nav:
+                    # a headful run is for watching the browser, so always navigate
+                    tasks = {
+                        asyncio.create_task(self._fetch_and_extract(nav, s, term, price_max, per_site_k,
+                                                                    use_cache=headless, deadline=deadline,
+                                                                    hedge=hedge, price_min=price_min)): s
+                        for s in sites
+                    }
+                    pending = set(tasks)
+                    try:
+                        while pending:
+                            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                            done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                               return_when=asyncio.FIRST_COMPLETED)
+                            if not done:
+                                # budget spent: rank and summarize what we have
+                                timed_out = sorted(tasks[t] for t in pending)
+                                break
+                            for task in done:
+                                site = tasks[task]
+                                try:
+                                    items, meta, outcome = task.result()
+                                except Exception as e:
+                                    logger.warning("site task error for %s: %s", site, e)
+                                    items, meta, outcome = [], None, {}
+                                if outcome.get("fetched"):
+                                    # only pages that loaded teach the router: a blocked or timed-out site says
+                                    # nothing about the category, and cards outside the price range still count
+                                    self.parser.record(parsed, site, outcome["cards"] > 0)
+                                if meta is not None:
+                                    cache_meta[site] = meta
+                                self._add_unique(items, seen, unique)
+                                if snapshots:
+                                    yield {"event": "site", "site": site, "items": items, "cache": meta}
+                                    yield {"event": "ranking",
+                                           "items": self.ranker.rank(self._dedupe(unique), top_k, weights)}
+                    finally:
+                        # budget spent or consumer went away (client disconnect): stop waiting on the remaining sites
+                        for task in pending:
+                            task.cancel()
+
+                    candidates = self._dedupe(unique)
+                    with span("rank"):
+                        trimmed = self.ranker.rank(candidates, top_k, weights)
+                        rankings = self.ranker.rank_profiles(candidates, request["profiles"], top_k) \
+                            if request.get("profiles") else None
+                    # the profile rankings hold their own copies; everything shown is enriched and summarized
+                    shown = trimmed + [it for ranking in (rankings or {}).values() for it in ranking]
+                    if request.get("enrich"):
+                        # specs only for what will be shown, while the navigator is still open
+                        await self._enrich(nav, shown, deadline)
+                with span("summarize"):
+                    self.summarizer.summarize_items(shown)
+                    summary_text = self.summarizer.overview(trimmed)
+            result = {
+                "query": query,
+                "items": trimmed,
+                "summary": summary_text,
+                "cache": cache_meta or None,
+                "timed_out_sites": timed_out or None,
+                "rankings": rankings
+            }
+            if timings is not None:
+                result["timings"] = list(timings)
+        yield {"event": "done", "result": result}
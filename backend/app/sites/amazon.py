@@ -1,80 +1,101 @@
 # app/sites/amazon.py
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
-from ..core import schemas
-from ..core.schemas import Item
+from ..core.schemas import Listing
+from . import spec
 
-def search_url(term: str, price_max: int | None = None) -> str:
+CARD_SELECTOR = "div.s-result-item[data-component-type='s-search-result']"
+
+# amazon's own logging/ad beacons (see navigator_agent.DEFAULT_BLOCKED_HOSTS for generic trackers)
+BLOCKED_HOSTS = ("fls-eu.amazon.in", "unagi.amazon.in", "aax-eu.amazon.in", "amazon-adsystem.com")
+
+# text of the captcha / bot-block page, used to tell "blocked" from "no results"
+BLOCK_MARKERS = ("Type the characters you see in this image", "api-services-support@amazon.com")
+
+# declarative card/field selectors, see app/sites/spec.py
+LISTING_LAYOUTS = [
+    {
+        "card": CARD_SELECTOR,
+        "fields": {
+            "name": (["h2 a span", "span.a-size-medium"], None),
+            "link": (["h2 a"], "href"),
+            "price_whole": (["span.a-price-whole"], None),
+            "price_frac": (["span.a-price-fraction"], None),
+            "price_any": (["span.a-price"], None),
+            "rating": (["span.a-icon-alt"], None),
+            "reviews": (["span[aria-label*='ratings'], span.a-size-base"], None),
+            "image": (["img.s-image"], "src"),
+        },
+    },
+]
+
+def search_url(term: str, price_max: int | None = None, page: int = 1) -> str:
     from urllib.parse import quote_plus
     base = "https://www.amazon.in/s?k=" + quote_plus(term)
     if price_max:
         # Amazon price param in paise via p_36
         base += f"&rh=p_36%3A-{int(price_max)*100}"
+    if page > 1:
+        base += f"&page={page}"
     return base
 
+_PRICE_RE = re.compile(r"(\d+(\.\d+)?)")
+_NON_DIGITS_RE = re.compile(r"[^\d]")
+
 def _parse_price(text: str) -> float:
     if not text: return 0.0
     text = text.replace(",", "").strip()
-    m = re.search(r"(\d+(\.\d+)?)", text)
+    m = _PRICE_RE.search(text)
     return float(m.group(1)) if m else 0.0
 
-def parse_listings(html: str, top_k: int = 10) -> List[Dict]:
-    soup = BeautifulSoup(html, "lxml")
-    cards = soup.select("div.s-result-item[data-component-type='s-search-result']") or []
-    results = []
-    for c in cards:
-        title_el = c.select_one("h2 a span")
-        if not title_el:
-            title_el = c.select_one("span.a-size-medium")
-        link_el = c.select_one("h2 a")
-        price_whole = c.select_one("span.a-price-whole")
-        price_frac = c.select_one("span.a-price-fraction")
-        rating_el = c.select_one("span.a-icon-alt")
-        reviews_el = c.select_one("span[aria-label*='ratings'], span.a-size-base")
-
-        name = title_el.get_text(strip=True) if title_el else None
-        link = None
-        if link_el and link_el.get("href"):
-            href = link_el.get("href")
-            if href.startswith("/"):
-                link = "https://www.amazon.in" + href
-            else:
-                link = href
-        price_text = None
-        if price_whole:
-            price_text = price_whole.get_text(strip=True) + (price_frac.get_text(strip=True) if price_frac else "")
-        elif c.select_one("span.a-price"):
-            price_text = c.select_one("span.a-price").get_text(strip=True)
-        rating = rating_el.get_text(strip=True) if rating_el else None
-        reviews = reviews_el.get_text(strip=True) if reviews_el else None
-
-        if not name or not link:
-            continue
-        try:
-            price = _parse_price(price_text) if price_text else 0.0
-        except:
-            price = 0.0
-
-        try:
-            rating_val = float(rating.split(" out of")[0]) if rating else None
-        except:
-            rating_val = None
-
-        try:
-            import re
-            reviews_val = int(re.sub(r"[^\d]", "", reviews)) if reviews else None
-        except:
-            reviews_val = None
-
-        results.append({
-            "name": name,
-            "price": price,
-            "rating": rating_val,
-            "reviews": reviews_val,
-            "link": link,
-            "source": "amazon.in"
-        })
-        if len(results) >= top_k:
-            break
-    return results
+def build_item(f: Dict) -> Listing | None:
+    name = f.get("name")
+    href = f.get("link")
+    if not name or not href:
+        return None
+    link = "https://www.amazon.in" + href if href.startswith("/") else href
+    if f.get("price_whole"):
+        price_text = f["price_whole"] + (f.get("price_frac") or "")
+    else:
+        price_text = f.get("price_any")
+    try:
+        price = _parse_price(price_text) if price_text else 0.0
+    except:
+        price = 0.0
+
+    rating = f.get("rating")
+    try:
+        rating_val = float(rating.split(" out of")[0]) if rating else None
+    except:
+        rating_val = None
+
+    reviews = f.get("reviews")
+    try:
+        reviews_val = int(_NON_DIGITS_RE.sub("", reviews)) if reviews else None
+    except:
+        reviews_val = None
+
+    return Listing(name=name, price=price, rating=rating_val, reviews=reviews_val, link=link, source="amazon.in")
+
+# product detail page: wait for the title, then read the spec tables
+DETAIL_WAIT_SELECTOR = "#productTitle"
+
+# see SpecExtractor in app/sites/spec.py
+SPEC_LAYOUTS = [
+    {"row": "#productDetails_techSpec_section_1 tr, #productDetails_detailBullets_sections1 tr, #prodDetails table tr",
+     "key": "th", "value": "td"},
+    {"row": "#detailBullets_feature_div li > span.a-list-item", "key": "span.a-text-bold",
+     "value": "span.a-text-bold + span"},
+    {"row": "#productOverview_feature_div tr", "key": "td:first-child", "value": "td:last-child"},
+]
+
+# compiled once at import
+EXTRACTOR = spec.ListingExtractor(LISTING_LAYOUTS, build_item)
+
+def parse_listings(html: str, top_k: Optional[int] = 10) -> List[Listing]:
+    return EXTRACTOR.parse(html, top_k=top_k)
+
+SPECS = spec.SpecExtractor(SPEC_LAYOUTS)
+
+def parse_specs(html: str) -> Dict[str, str]:
+    return SPECS.parse(html)
@@ -1,59 +1,90 @@
 # app/sites/flipkart.py
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
+from ..core.schemas import Listing
+from . import spec
 
-def search_url(term: str, price_max: int | None = None) -> str:
+# list-style and grid-style result cards
+CARD_SELECTOR = "a._1fQZEK, div._2kHMtA"
+
+BLOCKED_HOSTS = ()
+
+# text of the captcha / bot-block page, used to tell "blocked" from "no results"
+BLOCK_MARKERS = ("Access Denied", "Are you a human?")
+
+# Two common card shapes, tried in order: list-style (the card is the link) & grid.
+# See app/sites/spec.py for the layout format.
+LISTING_LAYOUTS = [
+    {
+        "card": "a._1fQZEK",
+        "fields": {
+            "name": (["div._4rR01T"], None),
+            "link": ([""], "href"),
+            "price": (["div._30jeq3"], None),
+            "rating": (["div._3LWZlK"], None),
+            "reviews": (["span._2_R_DZ"], None),
+        },
+    },
+    {
+        "card": "div._2kHMtA",
+        "fields": {
+            "name": (["a.s1Q9rs"], None),
+            "link": (["a"], "href"),
+            "price": (["div._30jeq3"], None),
+            "rating": (["div._3LWZlK"], None),
+        },
+    },
+]
+
+def search_url(term: str, price_max: int | None = None, page: int = 1) -> str:
     from urllib.parse import quote_plus
     base = "https://www.flipkart.com/search?q=" + quote_plus(term)
     # Flipkart price filters are more complex; rely on UI for now
+    if page > 1:
+        base += f"&page={page}"
     return base
 
+_PRICE_RE = re.compile(r"(\d+(\.\d+)?)")
+_NON_DIGITS_RE = re.compile(r"[^\d]")
+
 def _parse_price(text: str) -> float:
     if not text: return 0.0
     text = text.replace("₹", "").replace(",", "").strip()
-    m = re.search(r"(\d+(\.\d+)?)", text)
+    m = _PRICE_RE.search(text)
     return float(m.group(1)) if m else 0.0
 
-def parse_listings(html: str, top_k: int = 10) -> List[Dict]:
-    soup = BeautifulSoup(html, "lxml")
-    # Most product pages have cards under div._1AtVbE or div._2kHMtA
-    cards = soup.select("div._1AtVbE div._2kHMtA") or soup.select("a._1fQZEK") or []
-    results = []
-    # Two common card shapes: grid & list
-    # First try list-style:
-    list_cards = soup.select("a._1fQZEK")
-    if list_cards:
-        for c in list_cards[:top_k]:
-            name_el = c.select_one("div._4rR01T")
-            price_el = c.select_one("div._30jeq3")
-            rating_el = c.select_one("div._3LWZlK")
-            reviews_el = c.select_one("span._2_R_DZ")
-            name = name_el.get_text(strip=True) if name_el else None
-            link = "https://www.flipkart.com" + c.get("href") if c.get("href") else None
-            price = _parse_price(price_el.get_text(strip=True)) if price_el else 0.0
-            rating = float(rating_el.get_text(strip=True)) if rating_el else None
-            reviews = None
-            if reviews_el:
-                import re
-                reviews = int(re.sub(r"[^\d]", "", reviews_el.get_text()))
-            if name and link:
-                results.append({
-                    "name": name, "price": price, "rating": rating, "reviews": reviews, "link": link, "source": "flipkart.com"
-                })
-    else:
-        # Fallback: try grid cards
-        grid = soup.select("div._2kHMtA")
-        for c in grid[:top_k]:
-            name_el = c.select_one("a.s1Q9rs")
-            price_el = c.select_one("div._30jeq3")
-            rating_el = c.select_one("div._3LWZlK")
-            link_el = c.select_one("a")
-            name = name_el.get_text(strip=True) if name_el else None
-            link = "https://www.flipkart.com" + (link_el.get("href") if link_el else "")
-            price = _parse_price(price_el.get_text(strip=True)) if price_el else 0.0
-            rating = float(rating_el.get_text(strip=True)) if rating_el else None
-            results.append({
-                "name": name, "price": price, "rating": rating, "reviews": None, "link": link, "source": "flipkart.com"
-            })
-    return results[:top_k]
+def build_item(f: Dict) -> Listing | None:
+    name = f.get("name")
+    href = f.get("link")
+    if not name or not href:
+        return None
+    link = "https://www.flipkart.com" + href if href.startswith("/") else href
+    price = _parse_price(f["price"]) if f.get("price") else 0.0
+    try:
+        rating = float(f["rating"]) if f.get("rating") else None
+    except ValueError:
+        rating = None
+    reviews = None
+    if f.get("reviews"):
+        digits = _NON_DIGITS_RE.sub("", f["reviews"])
+        reviews = int(digits) if digits else None
+    return Listing(name=name, price=price, rating=rating, reviews=reviews, link=link, source="flipkart.com")
+
+# product detail page: wait for the title, then read the specifications table
+DETAIL_WAIT_SELECTOR = "span.B_NuCI, span.VU-ZEz"
+
+# see SpecExtractor in app/sites/spec.py
+SPEC_LAYOUTS = [
+    {"row": "div._14cfVK tr._1s_Smc, div._3k-BhJ tr", "key": "td:first-child", "value": "td:last-child"},
+]
+
+# compiled once at import
+EXTRACTOR = spec.ListingExtractor(LISTING_LAYOUTS, build_item)
+
+def parse_listings(html: str, top_k: Optional[int] = 10) -> List[Listing]:
+    return EXTRACTOR.parse(html, top_k=top_k)
+
+SPECS = spec.SpecExtractor(SPEC_LAYOUTS)
+
+def parse_specs(html: str) -> Dict[str, str]:
+    return SPECS.parse(html)
@@ -1,36 +1,68 @@
 # app/sites/myntra.py
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
+from ..core.schemas import Listing
+from . import spec
 
-def search_url(term: str, price_max: int | None = None) -> str:
+CARD_SELECTOR = "li.product-base, div.product"
+
+BLOCKED_HOSTS = ()
+
+# text of the captcha / bot-block page, used to tell "blocked" from "no results"
+BLOCK_MARKERS = ("Access Denied",)
+
+_FIELDS = {
+    "name": (["h4.product-product", "h3.product-brand"], None),
+    "link": (["a"], "href"),
+    "price": (["span.product-discountedPrice", "span.price"], None),
+}
+
+# current layout first, then the newer div-based one (see app/sites/spec.py)
+LISTING_LAYOUTS = [
+    {"card": "li.product-base", "fields": _FIELDS},
+    {"card": "div.product", "fields": _FIELDS},
+]
+
+def search_url(term: str, price_max: int | None = None, page: int = 1) -> str:
     from urllib.parse import quote_plus
     base = "https://www.myntra.com/" + quote_plus(term)
+    if page > 1:
+        base += f"?p={page}"
     return base
 
+_PRICE_RE = re.compile(r"(\d+(\.\d+)?)")
+_NON_DIGITS_RE = re.compile(r"[^\d]")
+
 def _parse_price(text: str) -> float:
     if not text: return 0.0
     t = text.replace("₹", "").replace(",", "").strip()
-    m = re.search(r"(\d+(\.\d+)?)", t)
+    m = _PRICE_RE.search(t)
     return float(m.group(1)) if m else 0.0
 
-def parse_listings(html: str, top_k: int = 10) -> List[Dict]:
-    soup = BeautifulSoup(html, "lxml")
-    cards = soup.select("li.product-base")
-    if not cards:  # fallback new layout
-        cards = soup.select("div.product")
-    results = []
-    for c in cards[:top_k]:
-        name_el = c.select_one("h4.product-product") or c.select_one("h3.product-brand")
-        price_el = c.select_one("span.product-discountedPrice") or c.select_one("span.price")
-        link_el = c.select_one("a")
-        if not (name_el and link_el):
-            continue
-        name = name_el.get_text(strip=True)
-        href = link_el.get("href")
-        link = "https://www.myntra.com" + href if href and href.startswith("/") else href
-        price = _parse_price(price_el.get_text(strip=True)) if price_el else 0.0
-        results.append({
-            "name": name, "price": price, "rating": None, "reviews": None, "link": link, "source": "myntra.com"
-        })
-    return results
+def build_item(f: Dict) -> Listing | None:
+    name = f.get("name")
+    href = f.get("link")
+    if not (name and href):
+        return None
+    link = "https://www.myntra.com" + href if href.startswith("/") else href
+    price = _parse_price(f["price"]) if f.get("price") else 0.0
+    return Listing(name=name, price=price, link=link, source="myntra.com")
+
+# product detail page: wait for the title, then read the specifications grid
+DETAIL_WAIT_SELECTOR = "h1.pdp-title"
+
+# see SpecExtractor in app/sites/spec.py
+SPEC_LAYOUTS = [
+    {"row": "div.index-tableContainer div.index-row", "key": "div.index-rowKey", "value": "div.index-rowValue"},
+]
+
+# compiled once at import
+EXTRACTOR = spec.ListingExtractor(LISTING_LAYOUTS, build_item)
+
+def parse_listings(html: str, top_k: Optional[int] = 10) -> List[Listing]:
+    return EXTRACTOR.parse(html, top_k=top_k)
+
+SPECS = spec.SpecExtractor(SPEC_LAYOUTS)
+
+def parse_specs(html: str) -> Dict[str, str]:
+    return SPECS.parse(html)
@@ -0,0 +1,140 @@
+# app/sites/spec.py
+# Declarative listing extractors shared by the site modules.
+#
+# A layout is {"card": <css>, "fields": {field: ([css, ...], attr)}}: the first
+# selector that matches inside a card wins, "" selects the card itself and
+# attr=None means the element's text. A site lists its layouts in preference
+# order; the first one with any cards on the page is used. The site's
+# build_item post-processes a raw {field: str} row into a schemas.Listing (or
+# None to drop the card).
+#
+# The same layouts drive the in-browser extraction in
+# navigator_agent.extract_rows and, compiled once at import into a
+# ListingExtractor, the offline lxml parser below.
+#
+# Product detail pages use spec layouts, {"row": <css>, "key": <css>, "value": <css>}:
+# every row matching any layout contributes one key/value pair to the specs
+# dict (first occurrence of a key wins), see SpecExtractor.
+import re
+from typing import Callable, Dict, List, Optional
+import lxml.html
+from lxml.cssselect import CSSSelector
+from lxml.etree import ParserError
+from ..core.schemas import Listing
+
+
+def _text(el) -> str:
+    # same as BeautifulSoup's get_text(strip=True): every text node stripped, then joined
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _document(html: str):
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an <?xml encoding=...?> declaration; let lxml decode the bytes itself
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+    except ParserError:
+        return None
+
+
+class _CompiledLayout:
+    def __init__(self, layout: Dict):
+        self.card = CSSSelector(layout["card"])
+        self.fields = [
+            (name, [None if sel == "" else CSSSelector(sel) for sel in selectors], attr)
+            for name, (selectors, attr) in layout["fields"].items()
+        ]
+
+    def row(self, card) -> Dict[str, Optional[str]]:
+        row = {}
+        for name, selectors, attr in self.fields:
+            row[name] = None
+            for sel in selectors:
+                if sel is None:
+                    el = card
+                else:
+                    found = sel(card)
+                    if not found:
+                        continue
+                    el = found[0]
+                row[name] = el.get(attr) if attr else _text(el)
+                break
+        return row
+
+
+class ListingExtractor:
+    """A site's layouts + build_item, with every CSS selector precompiled to XPath."""
+
+    def __init__(self, layouts: List[Dict], build_item: Callable[[Dict], Optional[Listing]]):
+        self.layouts = [_CompiledLayout(layout) for layout in layouts]
+        self.build_item = build_item
+
+    def parse(self, html: str, top_k: Optional[int] = 10) -> List[Listing]:
+        root = _document(html)
+        if root is None:
+            return []
+        for layout in self.layouts:
+            cards = layout.card(root)
+            if cards:
+                break
+        else:
+            return []
+        results = []
+        # stop as soon as top_k cards made it (None: every card); the rest of the page is never walked
+        for c in cards:
+            item = self.build_item(layout.row(c))
+            if item:
+                results.append(item)
+                if top_k is not None and len(results) >= top_k:
+                    break
+        return results
+
+
+def build_items(rows: List[Dict], build_item: Callable[[Dict], Optional[Listing]],
+                top_k: Optional[int] = 10) -> List[Listing]:
+    results = []
+    for row in rows:
+        item = build_item(row)
+        if item:
+            results.append(item)
+            if top_k is not None and len(results) >= top_k:
+                break
+    return results
+
+
+_KEY_JUNK_RE = re.compile(r"[^a-z0-9]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def spec_key(text: str) -> str:
+    # "Battery Power Rating :" / "\u200fRAM\u200e" -> "battery_power_rating" / "ram"
+    return _KEY_JUNK_RE.sub("_", text.lower()).strip("_")
+
+
+class SpecExtractor:
+    """A site's spec-table layouts precompiled; parse() returns {normalized key: value text}."""
+
+    def __init__(self, layouts: List[Dict], max_specs: int = 60):
+        self.layouts = [(CSSSelector(l["row"]), CSSSelector(l["key"]), CSSSelector(l["value"])) for l in layouts]
+        self.max_specs = max_specs
+
+    def parse(self, html: str) -> Dict[str, str]:
+        root = _document(html)
+        if root is None:
+            return {}
+        specs: Dict[str, str] = {}
+        for row_sel, key_sel, value_sel in self.layouts:
+            for row in row_sel(root):
+                keys, values = key_sel(row), value_sel(row)
+                if not keys or not values:
+                    continue
+                key = spec_key(" ".join(keys[0].itertext()))
+                value = _SPACE_RE.sub(" ", " ".join(values[0].itertext())).strip()
+                if key and value and key not in specs:
+                    specs[key] = value
+                    if len(specs) >= self.max_specs:
+                        return specs
+        return specs
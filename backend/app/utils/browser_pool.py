@@ -0,0 +1,356 @@
+# app/utils/browser_pool.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import psutil
+from playwright.async_api import async_playwright, Browser, BrowserContext, CDPSession
+from .metrics import span, BROWSER_RSS, BROWSER_PAGES, BROWSER_RECYCLES
+
+logger = logging.getLogger(__name__)
+
+# above this share of max_rss_mb a browser's idle contexts (and their renderers) are closed
+_SOFT_RSS_FRACTION = 0.8
+
+
+class _PooledBrowser:
+    def __init__(self, browser: Browser, index: int):
+        self.browser = browser
+        self.index = index
+        self.pages_served = 0
+        self.in_flight = 0
+        # retiring browsers get no new checkouts and are replaced once drained
+        self.retiring = False
+        self.retire_reason = ""
+        self.idle_contexts: List[BrowserContext] = []
+        self.context_pages: Dict[BrowserContext, int] = {}
+        # browser-level CDP session for SystemInfo.getProcessInfo; reopened after a relaunch
+        self.cdp: Optional[CDPSession] = None
+        self.rss: Optional[int] = None
+        # the running relaunch (see BrowserPool._start_replace); the browser is out of rotation meanwhile
+        self.replacement: Optional[asyncio.Task] = None
+
+    def retire(self, reason: str):
+        if not self.retiring:
+            self.retiring = True
+            self.retire_reason = reason
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser.is_connected() and not self.retiring and self.replacement is None
+
+
+class BrowserPool:
+    """Process-wide pool of warm Chromium browsers handing out reusable contexts.
+
+    Started once from the FastAPI lifespan; callers check a context out per site
+    fetch with ``async with pool.context() as ctx``.
+
+    Contexts are closed after ``max_pages_per_context`` pages. A browser is
+    retired after ``max_pages_per_browser`` pages, or once its processes'
+    resident memory (sampled every ``memory_interval`` seconds over CDP
+    SystemInfo.getProcessInfo + psutil) passes ``max_rss_mb``. A retiring
+    browser takes no new checkouts, finishes its in-flight pages and is then
+    relaunched. Memory-driven retirement goes one browser at a time so the
+    pool keeps serving; nearing the limit only closes idle contexts.
+    ``max_rss_mb=0`` disables the memory watchdog.
+
+    ``_lock`` only guards picking and marking browsers; relaunches and health
+    probes run outside it, so a slow Chromium launch never stalls checkouts
+    from the other browsers.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        contexts_per_browser: int = 3,
+        headless: bool = True,
+        user_agent: Optional[str] = None,
+        max_pages_per_context: int = 50,
+        max_pages_per_browser: int = 500,
+        health_interval: float = 30.0,
+        max_rss_mb: float = 1500.0,
+        memory_interval: float = 10.0,
+    ):
+        self.size = size
+        self.contexts_per_browser = contexts_per_browser
+        self.headless = headless
+        self.user_agent = user_agent
+        self.max_pages_per_context = max_pages_per_context
+        self.max_pages_per_browser = max_pages_per_browser
+        self.health_interval = health_interval
+        self.max_rss_mb = max_rss_mb
+        self.memory_interval = memory_interval
+        self._playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(self.capacity)
+        self._lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._memory_task: Optional[asyncio.Task] = None
+        self.replacements = 0
+        # (kind, reason) -> count, mirrored in the navigator_browser_recycles_total counter
+        self.recycles: Dict[str, int] = {}
+
+    @property
+    def capacity(self) -> int:
+        return self.size * self.contexts_per_browser
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        for i in range(self.size):
+            self._browsers.append(_PooledBrowser(await self._launch(), i))
+        # warm one context per browser so the first requests skip context creation
+        for pb in self._browsers:
+            pb.idle_contexts.append(await self._new_context(pb))
+        self._health_task = asyncio.create_task(self._health_loop())
+        if self.max_rss_mb:
+            self._memory_task = asyncio.create_task(self._memory_loop())
+        logger.info("browser pool started: %d browsers x %d contexts", self.size, self.contexts_per_browser)
+
+    async def stop(self):
+        for task in (self._health_task, self._memory_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._health_task = self._memory_task = None
+        relaunches = [pb.replacement for pb in self._browsers if pb.replacement is not None]
+        for task in relaunches:
+            task.cancel()
+        await asyncio.gather(*relaunches, return_exceptions=True)
+        for pb in self._browsers:
+            await self._close_browser(pb)
+        self._browsers = []
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> Browser:
+        with span("browser_launch"):
+            return await self._playwright.chromium.launch(headless=self.headless, args=["--no-sandbox"])
+
+    async def _new_context(self, pb: _PooledBrowser) -> BrowserContext:
+        ctx = await pb.browser.new_context(user_agent=self.user_agent)
+        pb.context_pages[ctx] = 0
+        return ctx
+
+    def _recycled(self, kind: str, reason: str):
+        key = f"{kind}:{reason}"
+        self.recycles[key] = self.recycles.get(key, 0) + 1
+        BROWSER_RECYCLES.labels(kind, reason).inc()
+
+    async def _close_context(self, pb: _PooledBrowser, ctx: BrowserContext, reason: str):
+        pb.context_pages.pop(ctx, None)
+        self._recycled("context", reason)
+        try:
+            await ctx.close()
+        except Exception:
+            pass
+
+    async def _close_browser(self, pb: _PooledBrowser):
+        pb.cdp = None
+        for ctx in list(pb.context_pages):
+            try:
+                await ctx.close()
+            except Exception:
+                pass
+        pb.idle_contexts.clear()
+        pb.context_pages.clear()
+        try:
+            await pb.browser.close()
+        except Exception:
+            pass
+
+    async def _replace(self, pb: _PooledBrowser, reason: str = "") -> bool:
+        """Swap a crashed or retired browser for a fresh one (run via _start_replace); False if the launch failed."""
+        reason = reason or pb.retire_reason or "retired"
+        rss_mb = f"{pb.rss / 2**20:.0f}MB" if pb.rss is not None else "n/a"
+        logger.warning("replacing browser #%d (reason=%s, connected=%s, pages_served=%d, rss=%s)",
+                       pb.index, reason, pb.browser.is_connected(), pb.pages_served, rss_mb)
+        try:
+            await self._close_browser(pb)
+            pb.browser = await self._launch()
+            pb.pages_served = 0
+            pb.retiring = False
+            pb.retire_reason = ""
+            pb.rss = None
+            self.replacements += 1
+            self._recycled("browser", reason)
+            BROWSER_PAGES.labels(str(pb.index)).set(0)
+            return True
+        except Exception as e:
+            # the old browser is closed, so the next checkout or health pass sees a crash and retries
+            logger.warning("relaunching browser #%d failed: %s", pb.index, e)
+            return False
+        finally:
+            pb.replacement = None
+
+    def _start_replace(self, pb: _PooledBrowser, reason: str = ""):
+        # caller holds the lock and has checked pb is idle; only the marking happens under it
+        if pb.replacement is None:
+            pb.replacement = asyncio.create_task(self._replace(pb, reason))
+
+    async def _checkout(self):
+        while True:
+            relaunching = []
+            async with self._lock:
+                for pb in self._browsers:
+                    if not pb.browser.is_connected() and pb.in_flight == 0:
+                        self._start_replace(pb, "crash")
+                candidates = [pb for pb in self._browsers if pb.healthy]
+                if not candidates:
+                    # every browser is draining or relaunching: relaunch the idle ones rather than fail the request
+                    for pb in self._browsers:
+                        if pb.in_flight == 0:
+                            self._start_replace(pb)
+                    relaunching = [pb.replacement for pb in self._browsers if pb.replacement is not None]
+                    if not relaunching:
+                        # all still draining pages: share the least busy one
+                        candidates = [min(self._browsers, key=lambda b: b.in_flight)]
+                if candidates:
+                    pb = min(candidates, key=lambda b: b.in_flight)
+                    pb.in_flight += 1
+                    break
+            done, _ = await asyncio.wait(relaunching, return_when=asyncio.FIRST_COMPLETED)
+            if len(done) == len(relaunching) and not any(task.result() for task in done):
+                raise RuntimeError("no pooled browser available: relaunch failed")
+        try:
+            ctx = pb.idle_contexts.pop() if pb.idle_contexts else await self._new_context(pb)
+        except Exception:
+            pb.in_flight -= 1
+            raise
+        return pb, ctx
+
+    async def _checkin(self, pb: _PooledBrowser, ctx: BrowserContext, ok: bool):
+        pb.in_flight -= 1
+        pb.pages_served += 1
+        BROWSER_PAGES.labels(str(pb.index)).set(pb.pages_served)
+        served = pb.context_pages.get(ctx, 0) + 1
+        if ok and served < self.max_pages_per_context and pb.browser.is_connected() and not pb.retiring:
+            pb.context_pages[ctx] = served
+            pb.idle_contexts.append(ctx)
+        else:
+            reason = "error" if not ok else "pages" if served >= self.max_pages_per_context else "browser"
+            await self._close_context(pb, ctx, reason)
+        if pb.pages_served >= self.max_pages_per_browser:
+            pb.retire("pages")
+        if pb.retiring and pb.in_flight == 0:
+            async with self._lock:
+                if pb.retiring and pb.in_flight == 0:
+                    self._start_replace(pb)
+
+    @asynccontextmanager
+    async def context(self):
+        await self._slots.acquire()
+        try:
+            pb, ctx = await self._checkout()
+            ok = False
+            try:
+                yield ctx
+                ok = True
+            finally:
+                await self._checkin(pb, ctx, ok)
+        finally:
+            self._slots.release()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.warning("browser pool health check failed: %s", e)
+
+    async def check_health(self):
+        async with self._lock:
+            for pb in self._browsers:
+                if pb.in_flight == 0 and (not pb.browser.is_connected() or pb.retiring):
+                    self._start_replace(pb, "" if pb.retiring else "crash")
+            probed = [pb for pb in self._browsers if pb.healthy]
+        for pb in probed:
+            # probe with a throwaway context, outside the lock; a hung browser fails here
+            try:
+                probe = await asyncio.wait_for(pb.browser.new_context(), timeout=10)
+                await probe.close()
+            except Exception:
+                async with self._lock:
+                    # busy browsers drain first, like any other retirement
+                    pb.retire("unhealthy")
+                    if pb.in_flight == 0:
+                        self._start_replace(pb)
+                continue
+            if not pb.idle_contexts and pb.healthy:
+                pb.idle_contexts.append(await self._new_context(pb))
+
+    async def browser_rss(self, pb: _PooledBrowser) -> Optional[int]:
+        """Resident bytes of a browser's process tree (browser, renderers, GPU, utility), or None if unreadable."""
+        try:
+            if pb.cdp is None:
+                pb.cdp = await pb.browser.new_browser_cdp_session()
+            info = await asyncio.wait_for(pb.cdp.send("SystemInfo.getProcessInfo"), timeout=5)
+        except Exception as e:
+            pb.cdp = None
+            logger.debug("process info unavailable for browser #%d: %s", pb.index, e)
+            return None
+        total = 0
+        for proc in info.get("processInfo", []):
+            try:
+                total += psutil.Process(proc["id"]).memory_info().rss
+            except psutil.Error:
+                # a renderer that exited between the two calls
+                pass
+        return total
+
+    async def _memory_loop(self):
+        while True:
+            await asyncio.sleep(self.memory_interval)
+            try:
+                await self.check_memory()
+            except Exception as e:
+                logger.warning("browser pool memory check failed: %s", e)
+
+    async def check_memory(self):
+        """Sample every browser's RSS, shed idle contexts near the limit and retire a browser past it."""
+        limit = self.max_rss_mb * 2**20
+        for pb in self._browsers:
+            if not pb.browser.is_connected():
+                continue
+            pb.rss = await self.browser_rss(pb)
+            if pb.rss is None:
+                continue
+            BROWSER_RSS.labels(str(pb.index)).set(pb.rss)
+            if pb.rss >= limit * _SOFT_RSS_FRACTION and pb.idle_contexts:
+                idle, pb.idle_contexts = pb.idle_contexts, []
+                for ctx in idle:
+                    await self._close_context(pb, ctx, "rss")
+        async with self._lock:
+            over = [pb for pb in self._browsers if pb.rss is not None and pb.rss >= limit and not pb.retiring]
+            # one at a time: retiring every bloated browser at once would leave nothing to serve from
+            if over and not any(pb.retiring for pb in self._browsers):
+                pb = max(over, key=lambda b: b.rss)
+                pb.retire("rss")
+                if pb.in_flight == 0:
+                    self._start_replace(pb)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "replacements": self.replacements,
+            "recycles": dict(self.recycles),
+            "browsers": [
+                {
+                    "index": pb.index,
+                    "connected": pb.browser.is_connected(),
+                    "in_flight": pb.in_flight,
+                    "pages_served": pb.pages_served,
+                    "idle_contexts": len(pb.idle_contexts),
+                    "retiring": pb.retiring,
+                    "retire_reason": pb.retire_reason or None,
+                    "relaunching": pb.replacement is not None,
+                    "rss_mb": round(pb.rss / 2**20, 1) if pb.rss is not None else None,
+                }
+                for pb in self._browsers
+            ],
+        }
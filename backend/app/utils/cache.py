@@ -0,0 +1,263 @@
+# app/utils/cache.py
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import msgspec
+from ..core.schemas import Listing
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """In-process LRU bounded by the total size of the stored JSON payloads."""
+
+    # cheap enough to call on the event loop (see _offload)
+    blocking = False
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, payload: str, stored_at: float):
+        self.delete(key)
+        self._data[key] = (payload, stored_at)
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes and len(self._data) > 1:
+            _, (old, _) = self._data.popitem(last=False)
+            self._bytes -= len(old)
+
+    def delete(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU in a single SQLite table, so entries survive restarts and are shared by workers.
+
+    Reads don't write: access times are buffered and flushed with the next ``set``
+    (or every ``touch_batch`` reads), and the byte total is kept in memory rather
+    than summed per write. Callers run it off the event loop (see _offload).
+    """
+
+    blocking = True
+
+    def __init__(self, path: str = "cache.sqlite3", max_bytes: int = 256 * 1024 * 1024, touch_batch: int = 256):
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL, stored_at REAL NOT NULL,"
+            " last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+        # one connection shared by the to_thread workers
+        self._lock = threading.Lock()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        # key -> last read time, not yet written to last_access
+        self._touched: Dict[str, float] = {}
+
+    def _flush_touches(self):
+        if self._touched:
+            self._db.executemany("UPDATE cache SET last_access = ? WHERE key = ?",
+                                 [(at, key) for key, at in self._touched.items()])
+            self._touched.clear()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._db.execute("SELECT payload, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._touched[key] = time.time()
+                if len(self._touched) >= self.touch_batch:
+                    with self._db:
+                        self._db.execute("BEGIN")
+                        self._flush_touches()
+            return row
+
+    def set(self, key: str, payload: str, stored_at: float):
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            # recent reads first, so eviction sees them
+            self._flush_touches()
+            old = self._db.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, payload, stored_at, last_access, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, stored_at, time.time(), len(payload)),
+            )
+            self._bytes += len(payload) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                # other workers write to the same file; recount before evicting on a stale total
+                self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while self._bytes > self.max_bytes:
+                victim = self._db.execute(
+                    "SELECT key, size FROM cache WHERE key != ? ORDER BY last_access LIMIT 1", (key,)
+                ).fetchone()
+                if victim is None:
+                    break
+                self._db.execute("DELETE FROM cache WHERE key = ?", (victim[0],))
+                self._bytes -= victim[1]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._touched.pop(key, None)
+            row = self._db.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._bytes -= row[0]
+
+
+async def _offload(backend, fn, *args):
+    # the SQLite backend does disk I/O (and fsyncs): keep it off the event loop;
+    # the in-memory LRU isn't worth a thread hop
+    if getattr(backend, "blocking", False):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+class _Entry(msgspec.Struct):
+    items: List[Listing]
+    top_k: int = 0
+
+
+# decodes straight into Listing structs; fields a newer/older version stored are ignored
+_ENTRY_DECODER = msgspec.json.Decoder(_Entry)
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+class ResultCache:
+    """Per-site listing cache with TTLs and stale-while-revalidate.
+
+    Entries younger than the site's TTL are served as hits. Entries past the TTL but
+    within ``stale_ttl`` more seconds are served immediately while one background
+    refresh per key re-fetches them. Anything older is a miss.
+    """
+
+    def __init__(self, backend=None, default_ttl: float = 600.0, site_ttls: Dict[str, float] | None = None,
+                 stale_ttl: float = 3600.0):
+        self.backend = backend or MemoryCacheBackend()
+        self.default_ttl = default_ttl
+        self.site_ttls = site_ttls or {}
+        self.stale_ttl = stale_ttl
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def key(site: str, term: str, price_max: int | None, price_min: int | None = None) -> str:
+        key = f"{site}|{normalize_term(term)}|{price_max or ''}"
+        return f"{key}|{price_min}" if price_min else key
+
+    def ttl_for(self, site: str) -> float:
+        return self.site_ttls.get(site, self.default_ttl)
+
+    def _load(self, key: str):
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        payload, stored_at = entry
+        try:
+            return _ENTRY_DECODER.decode(payload), stored_at
+        except msgspec.DecodeError:
+            self.backend.delete(key)
+            return None
+
+    def _store(self, key: str, items: List[Listing], top_k: int):
+        # empty results are usually a failed or blocked fetch; don't pin them
+        if items:
+            self.backend.set(key, msgspec.json.encode(_Entry(items, top_k)).decode(), time.time())
+
+    async def get_or_fetch(self, site: str, term: str, price_max: int | None, top_k: int,
+                           fetch: Callable[[], Awaitable[list]],
+                           refresh: Callable[[], Awaitable[list]] | None = None,
+                           price_min: int | None = None) -> Tuple[list, Dict[str, Any]]:
+        """Return (items, meta) for a site listing, calling ``fetch`` on a miss.
+
+        ``refresh`` is used for background revalidation; it must not depend on the
+        caller's request-scoped resources (defaults to ``fetch``).
+        """
+        key = self.key(site, term, price_max, price_min)
+        loaded = await _offload(self.backend, self._load, key)
+        now = time.time()
+        if loaded is not None:
+            value, stored_at = loaded
+            age = now - stored_at
+            ttl = self.ttl_for(site)
+            # an entry fetched for a smaller top_k can't answer a bigger request
+            if value.top_k >= top_k and age < ttl + self.stale_ttl:
+                stale = age >= ttl
+                if stale:
+                    self._schedule_refresh(key, top_k, refresh or fetch)
+                return value.items[:top_k], {"hit": True, "stale": stale, "age": round(age, 1)}
+
+        items = await fetch()
+        await _offload(self.backend, self._store, key, items, top_k)
+        return items, {"hit": False, "stale": False, "age": 0.0}
+
+    def _schedule_refresh(self, key: str, top_k: int, refresh: Callable[[], Awaitable[list]]):
+        if key in self._refreshing:
+            return
+
+        async def _run():
+            try:
+                await _offload(self.backend, self._store, key, await refresh(), top_k)
+            except Exception as e:
+                logger.warning("background refresh failed for %s: %s", key, e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_run())
+
+
+class ProductCache:
+    """Per-product detail cache (specs by product link) on a listing cache backend.
+
+    Shares the backend, and so its size budget, with ResultCache; keys are
+    prefixed so the two never collide. Entries older than ``ttl`` are misses.
+    """
+
+    def __init__(self, backend=None, ttl: float = 7 * 24 * 3600.0):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+
+    @staticmethod
+    def key(link: str) -> str:
+        return f"product|{link}"
+
+    def get(self, link: str) -> Dict[str, Any] | None:
+        entry = self.backend.get(self.key(link))
+        if entry is None:
+            return None
+        payload, stored_at = entry
+        if time.time() - stored_at >= self.ttl:
+            return None
+        try:
+            return json.loads(payload)
+        except ValueError:
+            self.backend.delete(self.key(link))
+            return None
+
+    def set(self, link: str, specs: Dict[str, Any]):
+        # like listings, an empty result is more likely a failed fetch than a product without specs
+        if specs:
+            self.backend.set(self.key(link), json.dumps(specs), time.time())
+
+    async def get_async(self, link: str) -> Dict[str, Any] | None:
+        return await _offload(self.backend, self.get, link)
+
+    async def set_async(self, link: str, specs: Dict[str, Any]):
+        await _offload(self.backend, self.set, link, specs)
@@ -0,0 +1,227 @@
+# app/utils/job_queue.py
+import asyncio
+import itertools
+import json
+import logging
+import math
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .metrics import JOBS, JOB_BACKLOG
+
+logger = logging.getLogger(__name__)
+
+# lower runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+# share of the backlog a class may fill up to; under load low-priority work is shed first
+BACKLOG_SHARES = {"high": 1.0, "normal": 0.8, "low": 0.5}
+
+
+class QueueFull(Exception):
+    """The backlog has no room for this priority class; retry after ``retry_after`` seconds."""
+
+    def __init__(self, priority: str, retry_after: int):
+        super().__init__(f"{priority} job backlog is full, retry in {retry_after}s")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+def job_key(payload: Dict[str, Any]) -> str:
+    # identical requests (up to case and whitespace in the query) share one job
+    query = " ".join(str(payload.get("query", "")).lower().split())
+    return json.dumps(dict(payload, query=query), sort_keys=True, default=str)
+
+
+class Job:
+    def __init__(self, key: str, payload: Dict[str, Any], priority: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.priority = priority
+        # queued -> running -> done | failed | cancelled (queued -> cancelled directly)
+        self.status = "queued"
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._entry: Tuple[int, int] = (0, 0)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """In-process priority job queue run by a fixed pool of worker tasks.
+
+    ``submit`` enqueues a request for ``runner`` (Orchestrator.run) and returns
+    at once; an identical request already queued or running is handed back
+    instead of queued twice (and promoted if the new one has a higher
+    priority). The backlog is bounded: a class may only queue while the whole
+    backlog is under its BACKLOG_SHARES of ``max_backlog``, otherwise submit
+    raises QueueFull with a Retry-After estimate from the average run time.
+    Finished jobs are kept for ``retention`` seconds for polling.
+    """
+
+    def __init__(self, runner: Callable[[Dict[str, Any]], Awaitable[Any]], workers: int = 2, max_backlog: int = 100,
+                 timeout: Optional[float] = 120.0, retention: float = 600.0):
+        self.runner = runner
+        self.workers = workers
+        self.max_backlog = max_backlog
+        self.timeout = timeout
+        self.retention = retention
+        self.jobs: Dict[str, Job] = {}
+        # dedup key -> the queued or running job for it
+        self._active: Dict[str, Job] = {}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._backlog = {p: 0 for p in PRIORITIES}
+        self._tasks: List[asyncio.Task] = []
+        # moving average of job run time, seeds the Retry-After estimate
+        self._avg_runtime = 5.0
+
+    @property
+    def backlog(self) -> int:
+        return sum(self._backlog.values())
+
+    def retry_after(self) -> int:
+        # roughly when a worker frees up for the job at the back of the queue
+        return max(1, min(300, math.ceil((self.backlog / max(1, self.workers) + 1) * self._avg_runtime)))
+
+    def _push(self, job: Job, priority: str):
+        job.priority = priority
+        job._entry = (PRIORITIES[priority], next(self._seq))
+        self._backlog[priority] += 1
+        JOB_BACKLOG.labels(priority).inc()
+        self._queue.put_nowait((*job._entry, job))
+
+    def _dequeued(self, job: Job):
+        self._backlog[job.priority] -= 1
+        JOB_BACKLOG.labels(job.priority).dec()
+
+    def _forget(self, job: Job):
+        if self._active.get(job.key) is job:
+            del self._active[job.key]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def submit(self, payload: Dict[str, Any], priority: str = "normal") -> Tuple[Job, bool]:
+        """(job, created); created is False when an identical job was already queued or running."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {list(PRIORITIES)}, got {priority!r}")
+        self._prune()
+        key = job_key(payload)
+        job = self._active.get(key)
+        if job is not None:
+            if job.status == "queued" and PRIORITIES[priority] < PRIORITIES[job.priority]:
+                # re-queue under the higher class; the old heap entry is skipped as stale
+                self._dequeued(job)
+                self._push(job, priority)
+            JOBS.labels(priority, "deduplicated").inc()
+            return job, False
+        if self.backlog >= max(1, int(self.max_backlog * BACKLOG_SHARES[priority])):
+            JOBS.labels(priority, "shed").inc()
+            raise QueueFull(priority, self.retry_after())
+        job = Job(key, payload, priority)
+        self.jobs[job.id] = job
+        self._active[key] = job
+        self._push(job, priority)
+        JOBS.labels(priority, "submitted").inc()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self.jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """Jobs that will run before this one, or None once it left the queue."""
+        if job.status != "queued":
+            return None
+        return sum(1 for j in self._active.values() if j.status == "queued" and j._entry < job._entry)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job (shared by everyone who submitted it); None if unknown."""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.status == "queued":
+            self._dequeued(job)
+            self._finish(job, "cancelled")
+        else:
+            job.task.cancel()
+            # let the pipeline unwind so the caller sees the final status
+            await asyncio.wait({job.task}, timeout=5.0)
+        return job
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self._forget(job)
+        JOBS.labels(job.priority, status).inc()
+
+    async def _run(self, job: Job):
+        started = time.monotonic()
+        try:
+            job.result = await asyncio.wait_for(self.runner(job.payload), self.timeout)
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+            raise
+        except asyncio.TimeoutError:
+            self._finish(job, "failed", f"timed out after {self.timeout}s")
+        except Exception as e:
+            logger.warning("job %s failed: %s", job.id, e)
+            self._finish(job, "failed", str(e))
+        else:
+            self._finish(job, "done")
+        finally:
+            self._avg_runtime = 0.8 * self._avg_runtime + 0.2 * (time.monotonic() - started)
+
+    async def _worker(self):
+        while True:
+            prio, seq, job = await self._queue.get()
+            # cancelled while queued, or promoted (its live entry is elsewhere in the heap)
+            if job.status != "queued" or job._entry != (prio, seq):
+                continue
+            self._dequeued(job)
+            job.status = "running"
+            job.started_at = time.time()
+            # own task, so cancelling the job doesn't take the worker down with it
+            job.task = asyncio.create_task(self._run(job))
+            try:
+                await asyncio.wait({job.task})
+            except asyncio.CancelledError:
+                job.task.cancel()
+                raise
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in list(self._active.values()):
+            if job.status == "queued":
+                self._dequeued(job)
+                self._finish(job, "cancelled")
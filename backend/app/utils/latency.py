@@ -0,0 +1,28 @@
+# app/utils/latency.py
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Rolling window of recent durations per key (e.g. per site) with quantile lookups."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        # quantiles from a handful of samples are noise; report nothing until we have enough
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def observe(self, key: str, seconds: float):
+        self._samples[key].append(seconds)
+
+    def quantile(self, key: str, q: float) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[idx]
+
+    def count(self, key: str) -> int:
+        samples = self._samples.get(key)
+        return len(samples) if samples else 0
@@ -0,0 +1,70 @@
+# app/utils/metrics.py
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+# browser stages run from a few ms (checkout) to tens of seconds (goto on a slow site)
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "navigator_stage_seconds", "Time spent per pipeline stage", ["site", "stage", "outcome"], buckets=_BUCKETS
+)
+STAGE_TOTAL = Counter("navigator_stage_total", "Pipeline stage executions", ["site", "stage", "outcome"])
+ITEMS_EXTRACTED = Counter("navigator_items_extracted_total", "Items extracted per site", ["site"])
+CACHE_LOOKUPS = Counter("navigator_cache_lookups_total", "Listing cache lookups", ["site", "result"])
+FETCH_ESCALATIONS = Counter("navigator_fetch_escalations_total", "HTTP-tier fetches escalated to a browser", ["site"])
+JOBS = Counter("navigator_jobs_total", "Background jobs by priority and outcome", ["priority", "outcome"])
+JOB_BACKLOG = Gauge("navigator_job_backlog", "Queued (not yet running) background jobs", ["priority"])
+BROWSER_RSS = Gauge("navigator_browser_rss_bytes", "Resident memory of a pooled browser and its child processes",
+                    ["browser"])
+BROWSER_PAGES = Gauge("navigator_browser_pages_served", "Pages served by a pooled browser since its last launch",
+                      ["browser"])
+BROWSER_RECYCLES = Counter("navigator_browser_recycles_total", "Pooled browsers/contexts closed and replaced",
+                           ["kind", "reason"])
+
+# per-request timing collector; set by collect_timings(), read by span()
+_timings: ContextVar[Optional[List[Dict]]] = ContextVar("navigator_timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Collect every span() finished in this context (and tasks created from it) into a list."""
+    timings: List[Dict] = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _timings.reset(token)
+        except ValueError:
+            # an abandoned async generator can be finalized from another context
+            _timings.set(None)
+
+
+@contextmanager
+def span(stage: str, site: str = ""):
+    """Time a pipeline stage into the Prometheus histograms and the current request's timings."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(site, stage, outcome).observe(elapsed)
+        STAGE_TOTAL.labels(site, stage, outcome).inc()
+        timings = _timings.get()
+        if timings is not None:
+            timings.append({"stage": stage, "site": site or None, "ms": round(elapsed * 1000, 2), "outcome": outcome})
+
+
+def render_latest():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,64 @@
+# app/utils/parse_pool.py
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PARSE_MODES = ("process", "thread", "inline")
+
+
+class ParsePool:
+    """Runs CPU-heavy HTML parsing off the event loop.
+
+    mode "process" uses a ProcessPoolExecutor (the callable and its arguments must be
+    picklable), "thread" a ThreadPoolExecutor, which only helps when the parser
+    releases the GIL (lxml does while building the tree), and "inline" runs on the
+    loop like before. At most ``max_pending`` parses are queued or running; further
+    callers wait for a slot. A parse that takes longer than ``timeout`` seconds is
+    abandoned with asyncio.TimeoutError (a process worker still finishes it in the
+    background).
+    """
+
+    def __init__(self, mode: str = "process", workers: Optional[int] = None, max_pending: int = 32,
+                 timeout: Optional[float] = 10.0):
+        if mode not in PARSE_MODES:
+            raise ValueError(f"unknown parse mode {mode!r}, expected one of {PARSE_MODES}")
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(max_pending)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # spawn: forking a process that runs an event loop and the playwright driver is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        if self.mode == "inline":
+            return fn(*args)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            try:
+                fut = loop.run_in_executor(self._get_executor(), fn, *args)
+                return await asyncio.wait_for(fut, timeout=self.timeout)
+            except BrokenProcessPool:
+                # a worker died (segfault / OOM); start a fresh pool for the next caller
+                logger.warning("parse process pool broken, recreating")
+                self._executor = None
+                raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
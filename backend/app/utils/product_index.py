@@ -0,0 +1,207 @@
+# app/utils/product_index.py
+import asyncio
+import math
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from ..core.schemas import Listing
+from .cache import normalize_term
+
+# filler the listing search tolerates but product names never contain
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset("a an and the for with of in on to best buy cheap online".split())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    link TEXT PRIMARY KEY, name TEXT NOT NULL, source TEXT, price REAL, rating REAL, reviews INTEGER,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_last_seen ON products(last_seen);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, source, content='products', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name, source) VALUES (new.rowid, new.name, new.source);
+END;
+CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, source) VALUES ('delete', old.rowid, old.name, old.source);
+END;
+CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE OF name, source ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, source) VALUES ('delete', old.rowid, old.name, old.source);
+    INSERT INTO products_fts(rowid, name, source) VALUES (new.rowid, new.name, new.source);
+END;
+CREATE TABLE IF NOT EXISTS terms (
+    site TEXT NOT NULL, term TEXT NOT NULL, price_max INTEGER NOT NULL DEFAULT 0,
+    price_min INTEGER NOT NULL DEFAULT 0,
+    top_k INTEGER NOT NULL DEFAULT 0, scraped_k INTEGER NOT NULL DEFAULT 0, scraped_at REAL,
+    found INTEGER NOT NULL DEFAULT 0,
+    heat REAL NOT NULL DEFAULT 0, last_hit REAL,
+    PRIMARY KEY (site, term, price_max, price_min)
+);
+"""
+
+
+def fts_query(term: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every meaningful word of a search term; None if nothing is left.
+
+    ``term`` is the planner's search_terms (ParserAgent.parse), which already has the price phrase taken out.
+    """
+    tokens = [t for t in _TOKEN_RE.findall(term.lower()) if t not in _STOPWORDS]
+    if not tokens:
+        return None
+    # quoted, so words like "or"/"near" or a stray '-' aren't read as FTS operators; names only,
+    # "amazon" in a query shouldn't match every amazon row's source
+    return "name : (%s)" % " ".join('"%s"' % t.replace('"', "") for t in tokens)
+
+
+class ProductIndex:
+    """Local SQLite index of every extracted listing, searchable with FTS5.
+
+    ``upsert`` records items and which (site, term, price range) they were
+    scraped for. ``lookup`` answers a site's share of a query from the index when that
+    term was scraped within ``fresh_ttl`` seconds, so only stale or unknown
+    sites need a navigation. Lookups heat their term (exponentially decayed with
+    ``half_life``) so a refresher can keep the hottest terms fresh.
+
+    Every lookup writes (the heat update) and every scrape upserts, so the
+    request path uses ``lookup_async``/``upsert_async`` and keeps that SQLite
+    I/O off the event loop.
+    """
+
+    def __init__(self, path: str = "products.sqlite3", fresh_ttl: float = 1800.0, half_life: float = 3600.0,
+                 retention: float = 7 * 24 * 3600.0):
+        self.fresh_ttl = fresh_ttl
+        self.half_life = half_life
+        self.retention = retention
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        # one connection shared by the to_thread workers
+        self._lock = threading.Lock()
+
+    def upsert(self, site: str, term: str, price_max: int | None, top_k: int, items: List[Listing],
+               price_min: int | None = None):
+        now = time.time()
+        rows = [
+            (it.link, it.name, it.source or site, it.price, it.rating, it.reviews, now)
+            for it in items if it.link and it.name
+        ]
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO products (link, name, source, price, rating, reviews, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(link) DO UPDATE SET name = excluded.name, source = excluded.source,"
+                " price = excluded.price, rating = excluded.rating, reviews = excluded.reviews,"
+                " last_seen = excluded.last_seen",
+                rows,
+            )
+            # an empty scrape is usually a failure; keep the term stale so it's retried
+            if rows:
+                self._db.execute(
+                    "INSERT INTO terms (site, term, price_max, price_min, top_k, scraped_k, scraped_at, found)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(site, term, price_max, price_min) DO UPDATE SET top_k = MAX(top_k, excluded.top_k),"
+                    " scraped_k = excluded.scraped_k, scraped_at = excluded.scraped_at, found = excluded.found",
+                    (site, normalize_term(term), price_max or 0, price_min or 0, top_k, top_k, now, len(rows)),
+                )
+
+    def _touch(self, site: str, term: str, price_max: int, price_min: int, top_k: int, now: float):
+        key = (site, term, price_max, price_min)
+        row = self._db.execute(
+            "SELECT heat, last_hit FROM terms WHERE site = ? AND term = ? AND price_max = ? AND price_min = ?", key
+        ).fetchone()
+        if row is None:
+            self._db.execute(
+                "INSERT INTO terms (site, term, price_max, price_min, top_k, heat, last_hit)"
+                " VALUES (?, ?, ?, ?, ?, 1, ?)",
+                (*key, top_k, now),
+            )
+            return
+        heat, last_hit = row
+        heat = heat * math.exp(-math.log(2) * (now - (last_hit or now)) / self.half_life) + 1
+        self._db.execute(
+            "UPDATE terms SET heat = ?, last_hit = ?, top_k = MAX(top_k, ?)"
+            " WHERE site = ? AND term = ? AND price_max = ? AND price_min = ?",
+            (heat, now, top_k, *key),
+        )
+
+    def lookup(self, site: str, term: str, price_max: int | None, top_k: int,
+               price_min: int | None = None) -> Tuple[Optional[List[Listing]], float]:
+        """(items, age) from the index, or (None, 0) when the site must be navigated for this term."""
+        with self._lock:
+            key = (site, normalize_term(term), price_max or 0, price_min or 0)
+            now = time.time()
+            self._touch(*key, top_k, now)
+            row = self._db.execute(
+                "SELECT scraped_k, scraped_at, found FROM terms"
+                " WHERE site = ? AND term = ? AND price_max = ? AND price_min = ?",
+                key,
+            ).fetchone()
+            # scraped_at alone isn't enough: a scrape for top_k=8 can't answer a top_k=20 request
+            if row is None or row[1] is None or now - row[1] >= self.fresh_ttl or row[0] < top_k:
+                return None, 0.0
+            match = fts_query(term)
+            if match is None:
+                return None, 0.0
+            sql = ("SELECT p.name, p.price, p.rating, p.reviews, p.link, p.source FROM products_fts f"
+                   " JOIN products p ON p.rowid = f.rowid"
+                   " WHERE products_fts MATCH ? AND p.source = ? AND p.last_seen >= ?")
+            params = [match, site, now - self.fresh_ttl]
+            if price_max:
+                sql += " AND p.price > 0 AND p.price <= ?"
+                params.append(price_max)
+            if price_min:
+                sql += " AND p.price >= ?"
+                params.append(price_min)
+            sql += " ORDER BY bm25(products_fts) LIMIT ?"
+            params.append(top_k)
+            items = [
+                Listing(name=r[0], price=r[1], rating=r[2], reviews=r[3], link=r[4], source=r[5])
+                for r in self._db.execute(sql, params)
+            ]
+            # the words don't find most of what the listing returned (names without the query words):
+            # navigating gives a better answer than a thin index hit
+            if len(items) < min(top_k, row[2]):
+                return None, 0.0
+            return items, now - row[1]
+
+    def hot_terms(self, limit: int = 20, min_heat: float = 2.0) -> List[Tuple[str, str, int | None, int | None, int]]:
+        """(site, term, price_max, price_min, top_k) of the hottest terms that are stale or about to be."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT site, term, price_max, price_min, top_k, heat, last_hit, scraped_at FROM terms"
+                " WHERE last_hit IS NOT NULL"
+            ).fetchall()
+        hot = []
+        for site, term, price_max, price_min, top_k, heat, last_hit, scraped_at in rows:
+            heat *= math.exp(-math.log(2) * (now - last_hit) / self.half_life)
+            # refresh a bit ahead of expiry so hot terms never serve a miss
+            if heat >= min_heat and (scraped_at is None or now - scraped_at >= self.fresh_ttl * 0.8):
+                hot.append((heat, site, term, price_max or None, price_min or None, top_k))
+        hot.sort(reverse=True)
+        return [entry[1:] for entry in hot[:limit]]
+
+    def prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM products WHERE last_seen < ?", (cutoff,))
+            self._db.execute("DELETE FROM terms WHERE COALESCE(last_hit, 0) < ? AND COALESCE(scraped_at, 0) < ?",
+                             (cutoff, cutoff))
+
+    async def lookup_async(self, site: str, term: str, price_max: int | None, top_k: int,
+                           price_min: int | None = None) -> Tuple[Optional[List[Listing]], float]:
+        return await asyncio.to_thread(self.lookup, site, term, price_max, top_k, price_min)
+
+    async def upsert_async(self, site: str, term: str, price_max: int | None, top_k: int, items: List[Listing],
+                           price_min: int | None = None):
+        # a write transaction (and its fsync) per scrape; not on the event loop
+        await asyncio.to_thread(self.upsert, site, term, price_max, top_k, items, price_min)
+
+    def close(self):
+        self._db.close()
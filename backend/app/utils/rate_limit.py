@@ -0,0 +1,105 @@
+# app/utils/rate_limit.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # the lock keeps waiters in FIFO order instead of all waking on the same refill
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AdaptiveLimiter:
+    """Concurrency limit adjusted AIMD-style.
+
+    Every ``limit`` successful calls within the latency target raise the limit by one;
+    an overload signal (block page, 429/503, timeout) or a call slower than
+    ``latency_target`` multiplies it by ``backoff``. Decreases are debounced by
+    ``cooldown`` seconds so one burst of failures only counts once.
+    """
+
+    def __init__(self, initial: int = 2, min_limit: int = 1, max_limit: int = 8, backoff: float = 0.5,
+                 latency_target: Optional[float] = None, cooldown: float = 5.0):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float):
+        if self.latency_target is not None and latency > self.latency_target:
+            self._decrease()
+            return
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_overload(self):
+        self._decrease()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        self._successes = 0
+
+
+class DomainLimiter:
+    """Token bucket plus adaptive concurrency limit for one domain."""
+
+    def __init__(self, rate: float = 1.0, burst: int = 3, initial: int = 2, max_concurrency: int = 6,
+                 latency_target: Optional[float] = None):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(initial=initial, max_limit=max_concurrency, latency_target=latency_target)
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.limiter.acquire()
+        try:
+            # take the token last so the request goes out right when it is spent
+            await self.bucket.acquire()
+            yield self.limiter
+        finally:
+            await self.limiter.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limiter.limit, "in_flight": self.limiter.in_flight}
@@ -0,0 +1,44 @@
+# app/utils/singleflight.py
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one shared task.
+
+    The shared work runs in its own task, and every caller awaits it through
+    asyncio.shield, so a cancelled caller (e.g. a disconnected client) only stops
+    waiting. The work itself is cancelled once nobody is waiting for it anymore.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, c=call: self._forget(key, c))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # last waiter left (cancelled); drop the key first so a new caller starts fresh
+                self._forget(key, call)
+                call.task.cancel()
@@ -0,0 +1,117 @@
+# app/utils/snapshot_store.py
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import zstandard
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT NOT NULL, fetched_at REAL NOT NULL, digest TEXT NOT NULL, size INTEGER NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'listing',
+    PRIMARY KEY (url, fetched_at)
+);
+CREATE INDEX IF NOT EXISTS snapshots_digest ON snapshots(digest);
+"""
+
+MODES = ("record", "replay")
+
+
+class SnapshotMissing(LookupError):
+    """Replay asked for a URL that was never recorded."""
+
+    def __init__(self, url: str):
+        super().__init__(f"no snapshot for {url}")
+        self.url = url
+
+
+class SnapshotStore:
+    """On-disk store of fetched pages: zstd blobs addressed by content hash, indexed by (url, fetched_at).
+
+    Identical pages (the same listing fetched twice with no change) share one
+    blob. In "record" mode NavigatorAgent (and the orchestrator's HTTP tier)
+    ``put`` every page it fetches; in "replay" mode pages are served from
+    ``get`` and nothing is navigated.
+    """
+
+    def __init__(self, root: str = "snapshots", mode: str = "record", level: int = 6):
+        if mode not in MODES:
+            raise ValueError(f"snapshot mode must be one of {MODES}, got {mode!r}")
+        self.root = Path(root)
+        self.mode = mode
+        self.level = level
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        # one connection shared by the to_thread workers
+        self._lock = threading.Lock()
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.zst"
+
+    def put(self, url: str, html: str, fetched_at: Optional[float] = None, kind: str = "listing") -> str:
+        """Store a page ("listing" or product "detail" ``kind``); returns its content digest."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # write-then-rename so a concurrent reader never sees half a blob
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(zstandard.ZstdCompressor(level=self.level).compress(data))
+            os.replace(tmp, path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshots (url, fetched_at, digest, size, kind) VALUES (?, ?, ?, ?, ?)",
+                (url, fetched_at or time.time(), digest, len(data), kind),
+            )
+        return digest
+
+    def _read(self, digest: str) -> str:
+        return zstandard.ZstdDecompressor().decompress(self._blob_path(digest).read_bytes()).decode("utf-8")
+
+    def get(self, url: str, at: Optional[float] = None) -> Optional[str]:
+        """The latest snapshot of ``url`` (taken at or before ``at`` when given), or None."""
+        sql = "SELECT digest FROM snapshots WHERE url = ?"
+        params = [url]
+        if at is not None:
+            sql += " AND fetched_at <= ?"
+            params.append(at)
+        sql += " ORDER BY fetched_at DESC LIMIT 1"
+        with self._lock:
+            row = self._db.execute(sql, params).fetchone()
+        return self._read(row[0]) if row else None
+
+    def latest(self, url_prefix: str = "", kind: str = "listing") -> Iterator[Tuple[str, float, str]]:
+        """(url, fetched_at, html) for the newest snapshot of every ``kind`` URL starting with ``url_prefix``."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, MAX(fetched_at), digest FROM snapshots WHERE url >= ? AND url < ? AND kind = ?"
+                " GROUP BY url ORDER BY url",
+                (url_prefix, url_prefix + "\uffff", kind),
+            ).fetchall()
+        for url, fetched_at, digest in rows:
+            yield url, fetched_at, self._read(digest)
+
+    async def put_async(self, url: str, html: str, kind: str = "listing") -> str:
+        # hashing + compressing a listing page is a few ms; keep it off the event loop
+        return await asyncio.to_thread(self.put, url, html, None, kind)
+
+    async def get_async(self, url: str) -> str:
+        html = await asyncio.to_thread(self.get, url)
+        if html is None:
+            raise SnapshotMissing(url)
+        return html
+
+    def close(self):
+        self._db.close()
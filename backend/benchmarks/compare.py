@@ -0,0 +1,64 @@
+# benchmarks/compare.py
+# Compare two benchmarks/run.py reports and flag regressions on the median.
+#
+#   python -m benchmarks.compare base.json head.json --threshold 0.10
+#
+# Exits 1 when any benchmark present in both reports got slower (or, for "bytes" results,
+# bigger) than threshold.
+import argparse
+import json
+import sys
+
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result.get("params", {}).items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(base: dict, head: dict, threshold: float):
+    base_by_key = {_key(r): r for r in base["results"]}
+    rows, regressions = [], []
+    for r in head["results"]:
+        key = _key(r)
+        unit = r.get("unit", "s")
+        old = base_by_key.get(key)
+        if old is None:
+            rows.append((key, unit, None, r["median"], None))
+            continue
+        change = (r["median"] - old["median"]) / old["median"] if old["median"] else 0.0
+        rows.append((key, unit, old["median"], r["median"], change))
+        if change > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def _fmt(value, unit: str) -> str:
+    if value is None:
+        return " " * 12
+    if unit == "bytes":
+        return f"{value / 1024:9.1f}KiB"
+    return f"{value * 1000:10.3f}ms"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="compare two benchmark reports")
+    ap.add_argument("base")
+    ap.add_argument("head")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown of the median")
+    args = ap.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    rows, regressions = compare(base, head, args.threshold)
+    print(f"base {base['meta'].get('commit')}  ->  head {head['meta'].get('commit')}")
+    for key, unit, old, new, change in rows:
+        change_s = f"{change:+7.1%}" if change is not None else "    new"
+        flag = "  REGRESSION" if key in regressions else ""
+        print(f"{_fmt(old, unit)} {_fmt(new, unit)} {change_s}  {key}{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/mock_storefront.py
+# Local stand-in for the three storefronts, serving the listing fixtures with
+# configurable response latency and client-side lazy loading, so the whole
+# pipeline can be benchmarked without touching the real sites.
+#
+#   python -m benchmarks.mock_storefront --port 8765 --latency-ms 300
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote_plus, urlsplit
+
+from app.sites import amazon, flipkart, myntra
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# path prefix -> (fixture file, card selector used by the lazy loader)
+ROUTES = {
+    "/amazon/": ("amazon_search.html", amazon.CARD_SELECTOR),
+    "/flipkart/": ("flipkart_list.html", flipkart.CARD_SELECTOR),
+    "/myntra/": ("myntra_search.html", myntra.CARD_SELECTOR),
+}
+
+# Detach every card after the first `initial` and re-attach them `batch` at a
+# time, `lazy_ms` after the user scrolls near the bottom (like the real infinite
+# scroll grids). Plain HTTP clients still see every card in the markup.
+_LAZY_JS = """
+<script>
+(function () {
+  const sel = %(selector)r, initial = %(initial)d, batch = %(batch)d, lazyMs = %(lazy_ms)d;
+  const slots = Array.from(document.querySelectorAll(sel)).slice(initial).map(c => {
+    const mark = document.createComment("lazy");
+    c.parentNode.replaceChild(mark, c);
+    return [mark, c];
+  });
+  let loading = false;
+  window.addEventListener("scroll", () => {
+    if (loading || !slots.length) return;
+    if (window.scrollY + window.innerHeight < document.body.scrollHeight - 200) return;
+    loading = true;
+    setTimeout(() => {
+      slots.splice(0, batch).forEach(([mark, c]) => mark.parentNode.replaceChild(c, mark));
+      loading = false;
+    }, lazyMs);
+  });
+})();
+</script>
+"""
+
+
+def make_handler(latency_ms: int = 0, jitter_ms: int = 0, initial: int = 8, batch: int = 8, lazy_ms: int = 150):
+    pages = {}
+    for prefix, (fixture, selector) in ROUTES.items():
+        html = (FIXTURES / fixture).read_text(encoding="utf-8")
+        script = _LAZY_JS % {"selector": selector, "initial": initial, "batch": batch, "lazy_ms": lazy_ms}
+        pages[prefix] = html.replace("</body>", script + "</body>").encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            body = next((page for prefix, page in pages.items() if path.startswith(prefix)), None)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            delay = latency_ms + (random.uniform(0, jitter_ms) if jitter_ms else 0)
+            time.sleep(delay / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class MockStorefront:
+    """Threaded HTTP server for the fixtures; use as a context manager."""
+
+    def __init__(self, port: int = 0, **handler_opts):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**handler_opts))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def url_builders(self) -> dict:
+        """SITE_URL_BUILDERS replacement that points every site at this server."""
+        base = self.base_url
+        return {
+            "amazon.in": lambda term, price_max=None, page=1: f"{base}/amazon/s?k={quote_plus(term)}&page={page}",
+            "flipkart.com": lambda term, price_max=None, page=1: f"{base}/flipkart/search?q={quote_plus(term)}&page={page}",
+            "myntra.com": lambda term, price_max=None, page=1: f"{base}/myntra/{quote_plus(term)}?p={page}",
+        }
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="serve the listing fixtures like the real storefronts")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=int, default=300)
+    ap.add_argument("--jitter-ms", type=int, default=200)
+    args = ap.parse_args()
+    with MockStorefront(args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms) as shop:
+        print("serving fixtures on", shop.base_url)
+        threading.Event().wait()
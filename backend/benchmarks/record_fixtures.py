@@ -0,0 +1,41 @@
+# benchmarks/record_fixtures.py
+# Re-record the listing fixtures from the live sites (needs network + chromium).
+# The checked-in fixtures are trimmed pages with the same card markup the site
+# modules select on; run this to benchmark against full-size live pages.
+#
+#   python -m benchmarks.record_fixtures "laptop"
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.agents.navigator_agent import NavigatorAgent
+from app.core.config import DEFAULT_USER_AGENT
+from app.pipeline.orchestrator import SITE_URL_BUILDERS, SITE_WAIT_SELECTORS
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# fixture name -> site
+TARGETS = {
+    "amazon_search": "amazon.in",
+    "flipkart_list": "flipkart.com",
+    "myntra_search": "myntra.com",
+}
+
+
+async def record(term: str):
+    async with NavigatorAgent(user_agent=DEFAULT_USER_AGENT) as nav:
+        for name, site in TARGETS.items():
+            url = SITE_URL_BUILDERS[site](term, None)
+            # full page, resources and all, so the fixture matches what the browser really serves
+            html = await nav.fetch_listing_html(url, wait_for_selector=SITE_WAIT_SELECTORS.get(site),
+                                                block_resources=False)
+            path = FIXTURES / f"{name}.html"
+            path.write_text(html, encoding="utf-8")
+            print(f"{site}: {len(html)} bytes -> {path}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="record live listing pages as benchmark fixtures")
+    ap.add_argument("term", nargs="?", default="laptop")
+    args = ap.parse_args()
+    asyncio.run(record(args.term))
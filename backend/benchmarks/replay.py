@@ -0,0 +1,65 @@
+# benchmarks/replay.py
+# Re-run extraction over every page in a snapshot store (SNAPSHOT_MODE=record), at disk speed.
+# Use it to check a parser change against thousands of real pages, or to rebuild the
+# extracted items in bulk after a selector fix.
+#
+#   python -m benchmarks.replay --dir snapshots
+#   python -m benchmarks.replay --dir snapshots --prefix https://www.flipkart.com/ --out items.jsonl
+import argparse
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import msgspec
+
+from app.agents.extractor_agent import SITE_PARSERS, extract_html
+from app.utils.snapshot_store import SnapshotStore
+
+
+def site_of(url: str) -> str | None:
+    host = urlsplit(url).hostname or ""
+    return next((site for site in SITE_PARSERS if host == site or host.endswith("." + site)), None)
+
+
+def replay(root: str, prefix: str = "", top_k: int = 50, out: str | None = None):
+    store = SnapshotStore(root, mode="replay")
+    pages, items, empty = Counter(), Counter(), Counter()
+    sink = open(out, "w", encoding="utf-8") if out else None
+    started = time.perf_counter()
+    try:
+        for url, fetched_at, html in store.latest(prefix):
+            site = site_of(url)
+            if site is None:
+                continue
+            extracted = extract_html(site, html, top_k=top_k)
+            pages[site] += 1
+            items[site] += len(extracted)
+            if not extracted:
+                # a page that used to have cards and now yields none is the selector regression to look at
+                empty[site] += 1
+                print(f"no items: {url}")
+            if sink:
+                for it in extracted:
+                    row = {"url": url, "fetched_at": fetched_at, **msgspec.structs.asdict(it)}
+                    sink.write(json.dumps(row, ensure_ascii=False) + "\n")
+    finally:
+        if sink:
+            sink.close()
+        store.close()
+    elapsed = time.perf_counter() - started
+    total = sum(pages.values())
+    for site in sorted(pages):
+        print(f"{site:14s} pages={pages[site]:6d} items={items[site]:7d} empty={empty[site]:5d}")
+    if total:
+        print(f"{total} pages in {elapsed:.2f}s ({total / elapsed:.0f} pages/s)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="re-extract every recorded page snapshot")
+    ap.add_argument("--dir", default="snapshots", help="snapshot store directory (SNAPSHOT_DIR)")
+    ap.add_argument("--prefix", default="", help="only URLs starting with this")
+    ap.add_argument("--top-k", type=int, default=50)
+    ap.add_argument("--out", help="write the extracted items as JSON lines")
+    args = ap.parse_args()
+    replay(args.dir, args.prefix, args.top_k, args.out)
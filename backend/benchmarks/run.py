@@ -0,0 +1,337 @@
+# benchmarks/run.py
+# Offline benchmark suite: query planner, site parsers, ExtractorAgent, RankingAgent, DedupAgent,
+# response serialization and the whole Orchestrator against the local mock storefront. Results are written as
+# JSON so two commits can be compared with benchmarks/compare.py.
+#
+#   cd backend
+#   python -m benchmarks.run --out bench-$(git rev-parse --short HEAD).json
+#   python -m benchmarks.run --suite parsers,ranking --quick
+#
+# The e2e suite needs a Playwright Chromium (`playwright install chromium`);
+# it is skipped with a note when none can be launched.
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import msgspec
+
+from app.agents import parser_agent
+from app.agents.extractor_agent import ExtractorAgent
+from app.agents.dedup_agent import DedupAgent
+from app.agents.ranking_agent import RankingAgent, PREFERENCE_PROFILES
+from app.agents.summarizer_agent import SummarizerAgent
+from app.core.schemas import Listing, QueryResponse
+from app.sites import amazon, flipkart, myntra
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+PARSER_CASES = [
+    ("amazon_search", amazon.parse_listings, "amazon.in"),
+    ("flipkart_list", flipkart.parse_listings, "flipkart.com"),
+    ("flipkart_grid", flipkart.parse_listings, "flipkart.com"),
+    ("myntra_search", myntra.parse_listings, "myntra.com"),
+    ("myntra_grid", myntra.parse_listings, "myntra.com"),
+]
+
+RANKING_SIZES = [10, 100, 1_000, 10_000, 100_000]
+DEDUP_SIZES = [100, 1_000, 5_000]
+RESPONSE_SIZES = [10, 100, 1_000, 10_000]
+
+E2E_QUERIES = ["laptop under 50000", "running shoes", "phone under 20k", "t-shirt"]
+
+
+def _stats(name: str, samples, **params) -> dict:
+    ordered = sorted(samples)
+    return {
+        "name": name,
+        "params": params,
+        "unit": "s",
+        "n": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+def timeit(fn, repeat: int, warmup: int = 1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return samples
+
+
+def synthetic_items(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    items = []
+    for i in range(n):
+        items.append(Listing(
+            name=f"Item {i}",
+            price=round(rnd.uniform(300, 150_000), 2) if rnd.random() > 0.05 else None,
+            rating=round(rnd.uniform(1, 5), 1) if rnd.random() > 0.2 else None,
+            reviews=rnd.randint(0, 200_000) if rnd.random() > 0.2 else None,
+            link=f"https://example.com/p/{i}",
+            source=rnd.choice(["amazon.in", "flipkart.com", "myntra.com"]),
+        ))
+    return items
+
+
+def bench_planner(repeat: int):
+    """ParserAgent.parse over fixtures/planner_queries.json, cold (memo cleared) and memoized.
+
+    Each fixture also pins the expected plan; a mismatch fails the run, since a
+    fast planner that reads "4k tv" as a ₹4000 cap empties the results.
+    """
+    cases = json.loads((FIXTURES / "planner_queries.json").read_text(encoding="utf-8"))
+    parser = parser_agent.ParserAgent(router=parser_agent.SiteRouter(explore=0.0))
+    wrong = []
+    for case in cases:
+        plan = parser.parse(case["query"])
+        got = {"category": plan["category"], "search_terms": plan["search_terms"], **plan["filters"]}
+        diff = {k: (got[k], v) for k, v in case.items() if k != "query" and got[k] != v}
+        if diff:
+            wrong.append(f"{case['query']!r}: {diff}")
+    if wrong:
+        raise AssertionError("planner regressions (got, expected):\n  " + "\n  ".join(wrong))
+    queries = [case["query"] for case in cases]
+
+    def cold():
+        parser_agent._plan.cache_clear()
+        for q in queries:
+            parser.parse(q)
+
+    results = [_stats("ParserAgent.parse", timeit(cold, repeat), queries=len(queries), memo=False)]
+    samples = timeit(lambda: [parser.parse(q) for q in queries], repeat)
+    results.append(_stats("ParserAgent.parse", samples, queries=len(queries), memo=True))
+    return results
+
+
+def bench_parsers(repeat: int):
+    results = []
+    for fixture, parse, _site in PARSER_CASES:
+        html = (FIXTURES / f"{fixture}.html").read_text(encoding="utf-8")
+        for top_k in (10, 50):
+            samples = timeit(lambda: parse(html, top_k=top_k), repeat)
+            results.append(_stats("parse_listings", samples, fixture=fixture, top_k=top_k, bytes=len(html)))
+    return results
+
+
+def bench_extractor(repeat: int):
+    results = []
+    extractor = ExtractorAgent()
+    for fixture, _parse, site in PARSER_CASES:
+        html = (FIXTURES / f"{fixture}.html").read_text(encoding="utf-8")
+        samples = timeit(lambda: extractor.extract(site, html, top_k=10), repeat)
+        results.append(_stats("ExtractorAgent.extract", samples, fixture=fixture, site=site, top_k=10))
+    return results
+
+
+def bench_ranking(repeat: int, sizes=RANKING_SIZES):
+    results = []
+    ranker = RankingAgent()
+    for n in sizes:
+        items = synthetic_items(n)
+        # fewer repeats for the big inputs so a full run stays in minutes
+        reps = max(3, repeat // max(1, n // 1_000))
+        samples = timeit(lambda: ranker.rank(items), reps)
+        results.append(_stats("RankingAgent.rank", samples, items=n))
+        samples = timeit(lambda: ranker.rank(items, top_k=10), reps)
+        results.append(_stats("RankingAgent.rank", samples, items=n, top_k=10))
+        samples = timeit(lambda: ranker.rank_profiles(items, list(PREFERENCE_PROFILES), top_k=10), reps)
+        results.append(_stats("RankingAgent.rank_profiles", samples, items=n, profiles=len(PREFERENCE_PROFILES),
+                              top_k=10))
+    return results
+
+
+def synthetic_listings(n: int, dup_rate: float = 0.3, seed: int = 0):
+    """Product-like titles where about dup_rate of them reappear on another site, slightly reworded."""
+    rnd = random.Random(seed)
+    brands = ["Apple", "Samsung", "Lenovo", "HP", "Dell", "Asus", "Acer", "Puma", "Nike", "Roadster"]
+    nouns = ["Laptop", "Phone", "Tablet", "Monitor", "Headphones", "Shoes", "T-shirt", "Watch", "Speaker"]
+    extras = ["Black", "Silver", "Blue", "Wireless", "Slim", "Pro", "Max", "Lite", "Gaming", "Sports"]
+    items = []
+    while len(items) < n:
+        name = " ".join([rnd.choice(brands), rnd.choice(nouns), f"M{rnd.randint(100, 9999)}",
+                         *rnd.sample(extras, 3), f"{rnd.choice([64, 128, 256, 512])} GB"])
+        price = round(rnd.uniform(300, 150_000), 2)
+        items.append(Listing(name=name, price=price, rating=round(rnd.uniform(1, 5), 1),
+                             reviews=rnd.randint(0, 50_000), link=f"https://example.com/p/{len(items)}",
+                             source="amazon.in"))
+        if rnd.random() < dup_rate and len(items) < n:
+            items.append(msgspec.structs.replace(items[-1], name=f"{name} ({rnd.choice(extras)})",
+                                                 price=round(price * 1.04, 2),
+                                                 link=f"https://example.com/p/{len(items)}", source="flipkart.com"))
+    return items
+
+
+def bench_dedup(repeat: int, sizes=DEDUP_SIZES):
+    results = []
+    dedup = DedupAgent()
+    for n in sizes:
+        items = synthetic_listings(n)
+        samples = timeit(lambda: dedup.dedupe(items), max(3, repeat // max(1, n // 1_000)))
+        results.append(_stats("DedupAgent.dedupe", samples, items=n))
+    return results
+
+
+def _allocated(fn) -> tuple:
+    # (bytes still held by fn's result, peak bytes while it ran)
+    tracemalloc.start()
+    try:
+        kept = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return current, peak
+
+
+def _bytes(name: str, value: int, **params) -> dict:
+    return {"name": name, "params": params, "unit": "bytes", "n": 1,
+            "min": value, "median": value, "mean": value, "p95": value, "max": value}
+
+
+def bench_response(repeat: int, sizes=RESPONSE_SIZES):
+    """/query response at large top_k: dict items + pydantic response_model vs Listing structs + msgspec.
+
+    "pydantic" is what FastAPI did with the dict result: validate it against
+    QueryResponse, dump to JSON-able python and json.dumps it. Allocation is
+    measured on the items themselves (retained) and on the serialization (peak).
+    """
+    results = []
+    ranker, summarizer = RankingAgent(), SummarizerAgent()
+    for n in sizes:
+        listings = summarizer.summarize_items(ranker.rank(synthetic_items(n)))
+        dicts = [msgspec.structs.asdict(it) for it in listings]
+        as_structs = {"query": "bench", "items": listings, "summary": "", "cache": None}
+        as_dicts = {"query": "bench", "items": dicts, "summary": "", "cache": None}
+
+        def pydantic_path():
+            data = QueryResponse.model_validate(as_dicts).model_dump(mode="json")
+            return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+        def msgspec_path():
+            return msgspec.json.encode(as_structs)
+
+        reps = max(3, repeat // max(1, n // 1_000))
+        results.append(_stats("response.serialize", timeit(pydantic_path, reps), items=n, path="pydantic"))
+        results.append(_stats("response.serialize", timeit(msgspec_path, reps), items=n, path="msgspec"))
+        results.append(_bytes("response.serialize_peak", _allocated(pydantic_path)[1], items=n, path="pydantic"))
+        results.append(_bytes("response.serialize_peak", _allocated(msgspec_path)[1], items=n, path="msgspec"))
+        # same field values either way; only the per-item containers differ
+        results.append(_bytes("response.items_retained",
+                              _allocated(lambda: [dict(d) for d in dicts])[0], items=n, path="dict"))
+        results.append(_bytes("response.items_retained",
+                              _allocated(lambda: [msgspec.structs.replace(it) for it in listings])[0],
+                              items=n, path="msgspec"))
+    return results
+
+
+async def _bench_e2e(repeat: int, latency_ms: int, concurrency: int):
+    from app.pipeline.orchestrator import Orchestrator
+    from app.utils.browser_pool import BrowserPool
+    from benchmarks.mock_storefront import MockStorefront
+
+    results = []
+    with MockStorefront(latency_ms=latency_ms, jitter_ms=latency_ms // 2) as shop:
+        pool = BrowserPool(size=2, contexts_per_browser=3)
+        try:
+            await pool.start()
+        except Exception as e:
+            print(f"skipping e2e: cannot launch chromium ({e.__class__.__name__})", file=sys.stderr)
+            return results
+        orch = Orchestrator(browser_pool=pool, url_builders=shop.url_builders(), parse_mode="process")
+        try:
+            samples = []
+            for i in range(repeat):
+                t = time.perf_counter()
+                await orch.run({"query": E2E_QUERIES[i % len(E2E_QUERIES)], "top_k": 5})
+                samples.append(time.perf_counter() - t)
+            results.append(_stats("Orchestrator.run", samples, mode="sequential", latency_ms=latency_ms))
+
+            # a burst of distinct concurrent queries; per-request latency under load
+            samples = []
+
+            async def one(q):
+                t = time.perf_counter()
+                await orch.run({"query": q, "top_k": 5})
+                samples.append(time.perf_counter() - t)
+
+            await asyncio.gather(*[one(f"{E2E_QUERIES[i % len(E2E_QUERIES)]} {i}") for i in range(concurrency)])
+            results.append(_stats("Orchestrator.run", samples, mode="burst", concurrency=concurrency,
+                                  latency_ms=latency_ms))
+        finally:
+            await orch.shutdown()
+            await pool.stop()
+    return results
+
+
+def bench_e2e(repeat: int, latency_ms: int = 300, concurrency: int = 8):
+    return asyncio.run(_bench_e2e(repeat, latency_ms, concurrency))
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+SUITES = {
+    "planner": bench_planner,
+    "parsers": bench_parsers,
+    "extractor": bench_extractor,
+    "ranking": bench_ranking,
+    "dedup": bench_dedup,
+    "response": bench_response,
+    "e2e": bench_e2e,
+}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="offline benchmarks for the navigator pipeline")
+    ap.add_argument("--suite", default=",".join(SUITES), help="comma separated: " + ", ".join(SUITES))
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--quick", action="store_true", help="few repeats, for a smoke run")
+    ap.add_argument("--out", help="write JSON results here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    repeat = 5 if args.quick else args.repeat
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": repeat,
+        },
+        "results": [],
+    }
+    for name in args.suite.split(","):
+        name = name.strip()
+        print(f"running {name} ...", file=sys.stderr)
+        # e2e runs are seconds each; keep their repeat count small
+        report["results"].extend(SUITES[name](min(repeat, 10) if name == "e2e" else repeat))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()